@@ -0,0 +1,15 @@
+"""
+alsGenerator as a package: `alsgen.cli` is the command-line entry point, and the generator
+modules (alsgen.alsGen, alsgen.templateCache, ...) are also reachable as attributes of the
+package, imported on first use.
+"""
+import importlib
+
+MODULES = ("alsGen", "alsRewrite", "alsStream", "asyncPipeline", "batchGen", "buildManifest", "instrumentation",
+           "parallelGzip", "relocateSets", "setCatalog", "setValidator", "shardMode", "stemClassifier", "stemScanner",
+           "templateCache", "trackTime", "watchMode")
+
+def __getattr__(name):
+    if name in MODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
@@ -0,0 +1,4 @@
+import sys
+from alsgen.cli import main
+
+sys.exit(main())
@@ -0,0 +1,635 @@
+import os
+import argparse
+import math
+import sys
+import json
+import time
+from urllib.parse import quote
+from . import trackTime  # Import the trackTime module
+from . import alsRewrite
+from . import templateCache
+from . import batchGen
+from . import buildManifest
+from . import setCatalog
+from . import stemClassifier
+from . import stemScanner
+from . import instrumentation
+# asyncPipeline, setValidator, shardMode and watchMode are imported by the modes that use them
+
+# 🛠 CONFIG: Paths (no built-in defaults: pass them on the command line or set the environment variables)
+TEMPLATES_ENV = "ALSGEN_TEMPLATES"
+STEMS_ENV = "ALSGEN_STEMS"
+ALS_FILES_FOLDER = os.environ.get(TEMPLATES_ENV)  # Folder where BPM ALS templates are stored (--templates overrides it)
+FLAC_FOLDER = os.environ.get(STEMS_ENV)  # STEMS root (the first command-line argument overrides it)
+BASE_TEMPLATE = None  # e.g. "alsFiles/70.als": derive every BPM (incl. 141 or 128.5) from this one template
+
+# ✅ CONFIG: Skip or overwrite existing ALS files
+SKIP_EXISTING = True  # Set to False if you want to overwrite existing ALS files
+
+# ✅ CONFIG: Only rebuild folders whose stems, template or generator version changed
+INCREMENTAL = True  # Uses the build manifest (see buildManifest.py); with SKIP_EXISTING, sets made before
+                    # the manifest (no record yet) are kept and recorded instead of being overwritten
+
+# ✅ CONFIG: Clip length from the audible end of the stems instead of the file length
+TRIM_SILENCE = False  # Ignore trailing silence/padding (needs numpy + soundfile, see trackTime.SILENCE_THRESHOLD_DB)
+BEATS_PER_BAR = 4  # Trimmed lengths are rounded up to a whole bar at the folder's BPM
+
+# ✅ CONFIG: Stem whose length sets every clip's LoopEnd/OutMarker
+LOOP_END_STEM = "drums"  # A template slot, or "longest" for the longest stem of the folder
+
+# ✅ CONFIG: Sets written per track folder, all from one scan, one duration probe and the cached templates
+# "template": None = the BPM template (or BASE_TEMPLATE); a bare file name is looked up in ALS_FILES_FOLDER
+# "stems": None = every stem, or a subset such as ["drums", "Inst"] for an instrumental set
+DEFAULT_VARIANTS = [{"output": "CH1.als", "template": None, "stems": None}]
+VARIANTS = DEFAULT_VARIANTS  # Or load a JSON list of the same objects with --variants
+
+# ✅ CONFIG: Record every written set in the set catalog (see setCatalog.py)
+CATALOG = True
+
+# ✅ CONFIG: Validation report written by --validate (see setValidator.py)
+VALIDATION_REPORT_PATH = "alsGen-validation.json"
+
+# ✅ CONFIG: Run report (see instrumentation.py)
+METRICS_PATH = None  # e.g. "alsGen-metrics.json" or "alsGen.prom" (Prometheus text format)
+
+def find_flac_folders(directory, bpm=None, key=None):
+    """
+    Streams the track folders of `directory` (<bpm>/<key>/<track> layout) that contain .flac files.
+    Yields tuples: (folder_path, track_names, bpm_value) while the scan is still running.
+    `bpm` / `key` optionally limit the scan to some BPM values / keys.
+    """
+    for root, bpm_value, key_value, flac_entries in stemScanner.scan_track_folders(directory, bpm, key):
+        track_names = get_track_names(flac_entries, directory)
+        if any(track_names.values()):
+            yield root, track_names, bpm_value
+
+def get_track_names(flac_entries, directory):
+    """
+    Maps the FLAC files of a track folder to their template slots (see stemClassifier.STEM_RULES),
+    as paths relative to `directory`.
+    """
+    return stemClassifier.classify_folder(flac_entries, lambda entry: os.path.relpath(entry.path, directory))
+
+def job_for_folder(folder):
+    """
+    Builds the (folder, track_names, bpm_value) job of a single track folder (watch mode), or None without stems.
+    """
+    try:
+        with os.scandir(folder) as it:
+            flac_entries = sorted((e for e in it if e.name.lower().endswith(".flac") and e.is_file()),
+                                  key=lambda e: e.name)
+    except OSError as e:
+        print(f"   Warning: Could not scan '{folder}': {e}")
+        return None
+    track_names = get_track_names(flac_entries, FLAC_FOLDER)
+    if not any(track_names.values()):
+        return None
+    return folder, track_names, extract_bpm_from_path(folder)
+
+def extract_bpm_from_path(folder_path):
+    """
+    Extracts the BPM from the folder structure.
+    Example: /Users/.../STEMS/133/5A/TrackName -> BPM = 133 (fractional folders like 128.5 are kept as floats)
+    """
+    parts = folder_path.split(os.sep)
+    bpm_value = stemScanner.parse_bpm(parts[-3]) if len(parts) >= 3 else None  # Third level from the end
+    if bpm_value is None:
+        print(f"   Warning: Could not extract BPM from path '{folder_path}'.")
+        return None
+    return bpm_value
+
+def select_blank_als(bpm_value, quiet=False):
+    """
+    Dynamically selects the correct blank ALS file based on BPM value.
+    With BASE_TEMPLATE set, every BPM uses the base template (the tempo is rewritten at render time).
+    """
+    if BASE_TEMPLATE and bpm_value:
+        if os.path.exists(BASE_TEMPLATE):
+            return BASE_TEMPLATE
+        if not quiet:
+            print(f"⚠️ Warning: Base template '{BASE_TEMPLATE}' not found. Skipping...")
+        return None
+    if bpm_value:
+        bpm_als_path = os.path.join(ALS_FILES_FOLDER, f"{bpm_value}.als")
+        if os.path.exists(bpm_als_path):
+            return bpm_als_path
+    if not quiet:
+        print(f"⚠️ Warning: No ALS file found for BPM {bpm_value}. Skipping...")
+    return None
+
+def get_duration_in_beats(track_path, bpm):
+    """
+    Gets the duration of one stem FLAC file in beats using the provided BPM.
+    """
+    try:
+        with instrumentation.timer("probe"):
+            duration_seconds = probe_duration(track_path)
+        instrumentation.detail(f"   {LOOP_END_STEM.capitalize()} Duration: {duration_seconds:.2f} seconds")
+        duration_beats = seconds_to_beats(duration_seconds, bpm)
+        instrumentation.detail(f"   Converted to {bpm} BPM: {duration_beats:.6f} beats")
+        return f"{duration_beats:.6f}"
+    except Exception as e:
+        print(f"   Error getting duration: {e}")
+        return None
+
+def get_longest_duration_in_beats(track_names, base_folder, bpm):
+    """
+    Scans all FLAC files in track_names, finds the longest duration,
+    and converts it to beats using the provided BPM.
+    """
+    durations = {}
+    for track_type, rel_path in track_names.items():
+        if rel_path:
+            flac_path = os.path.join(base_folder, rel_path)
+            try:
+                with instrumentation.timer("probe"):
+                    duration_seconds = probe_duration(flac_path)
+                durations[track_type] = duration_seconds
+                instrumentation.detail(f"   {track_type.capitalize()} Duration: {duration_seconds:.2f} seconds")
+            except Exception as e:
+                print(f"   Error getting duration for {track_type}: {e}")
+
+    if not durations:
+        print("   No valid durations found for any tracks.")
+        return None
+
+    longest_track = max(durations, key=durations.get)
+    longest_duration_seconds = durations[longest_track]
+    duration_beats = seconds_to_beats(longest_duration_seconds, bpm)
+    instrumentation.detail(f"   Longest track: {longest_track.capitalize()} ({longest_duration_seconds:.2f} seconds)")
+    instrumentation.detail(f"   Converted to {bpm} BPM: {duration_beats:.6f} beats")
+    return f"{duration_beats:.6f}"
+
+def get_loop_end(track_names, bpm_value):
+    """
+    Returns the new <LoopEnd>/<OutMarker> value (the LOOP_END_STEM duration in beats), or None.
+    """
+    if LOOP_END_STEM == "longest":
+        if bpm_value:
+            return get_longest_duration_in_beats(track_names, FLAC_FOLDER, bpm_value)
+        print("   No BPM value available; skipping LoopEnd modification.")
+        return None
+    if track_names.get(LOOP_END_STEM) and bpm_value:
+        flac_path = os.path.join(FLAC_FOLDER, track_names[LOOP_END_STEM])
+        return get_duration_in_beats(flac_path, bpm_value)
+    print(f"   No {LOOP_END_STEM} track or BPM value available; skipping LoopEnd modification.")
+    return None
+
+def probe_duration(track_path):
+    """
+    Duration of a stem in seconds: the file length, or with TRIM_SILENCE the end of its last audible block
+    (the file length again for a silent stem).
+    """
+    if TRIM_SILENCE:
+        return trackTime.get_audible_duration(track_path) or trackTime.get_track_duration(track_path)
+    return trackTime.get_track_duration(track_path)
+
+def seconds_to_beats(duration_seconds, bpm):
+    """
+    Converts a clip length to beats at `bpm`; with TRIM_SILENCE it is rounded up to the next bar line.
+    """
+    duration_beats = (duration_seconds * bpm) / 60
+    if TRIM_SILENCE:
+        # The tolerance keeps lengths that already end on a bar (up to float noise) where they are
+        duration_beats = math.ceil(duration_beats / BEATS_PER_BAR - 1e-6) * BEATS_PER_BAR
+    return duration_beats
+
+def build_options():
+    """
+    Run options recorded in the build manifest, so changing them rebuilds the affected sets.
+    Only values that differ from the defaults are recorded, so default runs keep matching older manifests.
+    """
+    options = {}
+    if TRIM_SILENCE:
+        options["trim_silence"] = [trackTime.SILENCE_THRESHOLD_DB, trackTime.SILENCE_BLOCK_SECONDS, BEATS_PER_BAR]
+    if LOOP_END_STEM != "drums":
+        options["loop_end"] = LOOP_END_STEM
+    return options or None
+
+def load_variants(path):
+    """
+    Reads a variant spec: a JSON list of {"output", "template", "stems"} objects.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        variants = json.load(f)
+    if not isinstance(variants, list) or not variants:
+        raise ValueError(f"Variant spec '{path}' must be a non-empty list.")
+    for variant in variants:
+        if not variant.get("output", "").endswith(".als"):
+            raise ValueError(f"Variant {variant} needs an 'output' file name ending in .als.")
+    return variants
+
+def resolve_variants(input_path):
+    """
+    Returns (output_name, template_path, stems) for every variant; template_path is None if it does not exist.
+    """
+    resolved = []
+    for variant in VARIANTS:
+        template_path = variant.get("template") or input_path
+        if template_path and not os.path.exists(template_path):
+            candidate = os.path.join(ALS_FILES_FOLDER or "", template_path)
+            template_path = candidate if os.path.exists(candidate) else None
+        resolved.append((variant["output"], template_path, variant.get("stems")))
+    return resolved
+
+def sample_refs(track_names, set_folder):
+    """
+    Complete SampleRef values for each stem of a set saved in `set_folder`: absolute path, path
+    relative to the set, browser path and the stem's file-level metadata (cached per stem version).
+    """
+    samples = {}
+    for stem, rel_path in track_names.items():
+        if not rel_path:
+            continue
+        path = os.path.abspath(os.path.join(FLAC_FOLDER, rel_path))
+        try:
+            info = trackTime.get_sample_info(path)
+        except OSError as e:
+            print(f"   Warning: Could not read '{path}' ({e}); keeping the template's sample data.")
+            continue
+        samples[stem] = dict(
+            info,
+            path=path.replace(os.sep, "/"),
+            relative_path=os.path.relpath(path, os.path.abspath(set_folder)).replace(os.sep, "/"),
+            url=f"userfolder:{os.path.abspath(FLAC_FOLDER)}#" + ":".join(quote(part, safe="'") for part in
+                                                                       rel_path.split(os.sep)),
+        )
+    return samples
+
+def render_als(input_path, track_names, bpm_value, new_loop_end, verbose=True, stems=None, set_folder=None):
+    """
+    Fills the cached, pre-analyzed template at the set's BPM and compresses it.
+    With `set_folder` (where the set is saved) every stem's SampleRef gets complete, current values.
+    Returns (als_data, counts, contents); with CATALOG, contents are the set's template, stem samples
+    and LoopEnd for record_set(), else None.
+    """
+    with instrumentation.timer("template_load"):
+        template = templateCache.get_template(input_path)
+    samples = sample_refs(track_names, set_folder) if set_folder else None
+    # LoopEnd/OutMarker edits and path/name substitutions happen in the same single splice
+    with instrumentation.timer("xml_edit"):
+        xml_data, counts = templateCache.fill_template(template, track_names, new_loop_end,
+                                                       verbose and not instrumentation.QUIET, bpm=bpm_value,
+                                                       stems=stems, samples=samples)
+    instrumentation.count("xml_edits", counts["LoopEnd"] + counts["OutMarker"])
+    instrumentation.count("substitutions", counts["path"] + counts["name"])
+    with instrumentation.timer("compress"):
+        als_data = alsRewrite.compress_als(xml_data)
+    instrumentation.count("xml_bytes", len(xml_data))  # Rendered (uncompressed) set; bytes_out is what is written
+    contents = None
+    if CATALOG:
+        contents = templateCache.describe_fill(template, track_names, new_loop_end, bpm=bpm_value, stems=stems,
+                                               samples=samples)
+        contents["template"] = input_path
+    return als_data, counts, contents
+
+def record_set(output_als, contents):
+    """
+    Adds a written set to the set catalog (no-op without contents, see render_als).
+    """
+    if contents:
+        setCatalog.record(setCatalog.set_info(output_als, contents["stems"], contents["loop_end"],
+                                              template=contents["template"]))
+
+def modify_als_file(input_path, target_folder, track_names, bpm_value):
+    """
+    Loads the selected ALS file, replaces FLAC references, updates <LoopEnd> and <OutMarker> with the LOOP_END_STEM duration,
+    and saves every variant (by default just "CH1.als") in the target folder.
+    Returns "written", "skipped", "no-template" or "failed".
+    """
+    try:
+        if input_path is None:
+            print(f"❌ Skipping folder '{target_folder}' due to missing ALS template.")
+            return "no-template"
+
+        variants = resolve_variants(input_path)
+        outputs = [name for name, _, _ in variants]
+
+        if SKIP_EXISTING and not INCREMENTAL and all(os.path.exists(os.path.join(target_folder, name)) for name in outputs):
+            print(f"⏭️ Skipping '{target_folder}' – {', '.join(outputs)} already exists.")
+            return "skipped"
+
+        # Get the clip length in beats (if available)
+        new_loop_end = get_loop_end(track_names, bpm_value)
+
+        # Fill each variant's cached template, then compress and write once
+        for output_name, template_path, stems in variants:
+            if template_path is None:
+                print(f"⚠️ Warning: No ALS template for variant '{output_name}'. Skipping it.")
+                continue
+            output_als = os.path.join(target_folder, output_name)
+            als_data, counts, contents = render_als(template_path, track_names, bpm_value, new_loop_end,
+                                                   stems=stems, set_folder=target_folder)
+            with instrumentation.timer("write"):
+                alsRewrite.write_atomic(output_als, als_data)
+            record_set(output_als, contents)
+            instrumentation.count("bytes_out", len(als_data))
+            modified_count = counts.get("LoopEnd", 0)
+            if not counts["path"] and any(track_names.values()):
+                # Nothing matched the template's stems: the set still plays the template's samples
+                print(f"⚠️ Warning: No sample reference of '{template_path}' was replaced in {output_als}.")
+                instrumentation.count("unmatched")
+
+            print(f"✅ Final modified ALS saved at: {output_als} (Modified {modified_count} LoopEnd elements)\n")
+        return "written"
+
+    except Exception as e:
+        print(f"❌ Error modifying ALS in folder '{target_folder}': {e}")
+        return "failed"
+
+def process_folder(job):
+    """
+    Batch worker: generates CH1.als (or every variant) for one (folder, track_names, bpm_value) job.
+    """
+    folder, track_names, bpm_value = job
+    blank_als_path = select_blank_als(bpm_value)
+    print(f"🎯 Processing folder: {folder} (BPM: {bpm_value or 'Unknown'})")
+    print(f"   Using ALS template: {blank_als_path if blank_als_path else '⚠️ Skipping (No ALS file)'}")
+    print("   Found track files:", track_names)
+    return modify_als_file(blank_als_path, folder, track_names, bpm_value)
+
+def validate_folder(job):
+    """
+    Validation worker: checks every set of a track folder (see setValidator.validate_set).
+    Returns {"status": "valid", "broken", "missing" or "no-template", "sets": [...]}.
+    """
+    from . import setValidator
+    folder = job[0]
+    sets = []
+    for name in outputs_for_job(job):
+        set_path = os.path.join(folder, name)
+        if not setValidator.exists(set_path):
+            sets.append({"set": set_path, "status": "missing", "samples": 0, "problems": [{"type": "missing-set"}]})
+            continue
+        sets.append(setValidator.validate_set(set_path, loop_end_for=get_loop_end, bpm=job[2]))
+    for result in sets:
+        if result["status"] != "valid":
+            problems = ", ".join(sorted({p["type"] for p in result["problems"]}))
+            print(f"❌ {result['set']}: {problems}")
+    statuses = {result["status"] for result in sets}
+    status = "broken" if "broken" in statuses else "missing" if "missing" in statuses else \
+        "valid" if sets else "no-template"
+    return {"status": status, "sets": sets}
+
+def probe_folder(job):
+    """
+    Pipeline stage 1 (I/O): picks the template and reads the stem durations.
+    Returns a render task, or a status string when there is nothing to render.
+    """
+    folder, track_names, bpm_value = job
+    input_path = select_blank_als(bpm_value)
+    if input_path is None:
+        return "no-template"
+    variants = [(os.path.join(folder, name), template_path, stems)
+                for name, template_path, stems in resolve_variants(input_path) if template_path]
+    if SKIP_EXISTING and not INCREMENTAL and all(os.path.exists(output_als) for output_als, _, _ in variants):
+        return "skipped"
+    return variants, track_names, bpm_value, get_loop_end(track_names, bpm_value)
+
+def render_folder(task):
+    """
+    Pipeline stage 2 (CPU): renders and compresses every variant of a folder.
+    Returns [(output_path, als_data, catalog contents), ...].
+    """
+    variants, track_names, bpm_value, new_loop_end = task
+    rendered = []
+    for output_als, template_path, stems in variants:
+        als_data, _, contents = render_als(template_path, track_names, bpm_value, new_loop_end, verbose=False,
+                                           stems=stems, set_folder=os.path.dirname(output_als))
+        rendered.append((output_als, als_data, contents))
+    return rendered
+
+def template_for_job(job):
+    return select_blank_als(job[2], quiet=True)
+
+def outputs_for_job(job):
+    """
+    Names of the set files a job writes (one per variant with a template).
+    """
+    return [name for name, template_path, _ in resolve_variants(template_for_job(job)) if template_path]
+
+def variants_for_job(job):
+    """
+    Variant list the build manifest tracks, or None for the plain CH1.als set.
+    """
+    if VARIANTS == DEFAULT_VARIANTS:
+        return None
+    return resolve_variants(template_for_job(job))
+
+RUN_OPTIONS = ("FLAC_FOLDER", "ALS_FILES_FOLDER", "BASE_TEMPLATE", "TRIM_SILENCE", "VARIANTS", "LOOP_END_STEM",
+               "CATALOG")
+
+def configure(compression=None, **options):
+    """
+    Sets run options by their CONFIG name (e.g. FLAC_FOLDER="/Volumes/STEMS") and, with
+    `compression` ({"level", "profile", "threads"}), the gzip settings.
+    """
+    unknown = set(options) - set(RUN_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown run option(s): {', '.join(sorted(unknown))}.")
+    globals().update(options)
+    if compression:
+        alsRewrite.set_compression(**compression)
+
+def worker_setup():
+    """
+    The configure() call that gives process workers this run's options (see batchGen.init_worker).
+    """
+    options = {name: globals()[name] for name in RUN_OPTIONS}
+    options["compression"] = {"level": alsRewrite.GZIP_LEVEL, "threads": alsRewrite.GZIP_THREADS}
+    return configure, options
+
+def folder_jobs(folders):
+    """
+    Jobs of the given track folders (no scan); folders outside FLAC_FOLDER or without stems are skipped.
+    """
+    for folder in folders:
+        rel_path = os.path.relpath(folder, FLAC_FOLDER)
+        if rel_path.startswith(os.pardir):
+            print(f"⚠️ Warning: '{folder}' is not inside {FLAC_FOLDER}. Skipping...")
+            continue
+        # Same path form as scanned jobs, so manifest and shard keys match
+        job = job_for_folder(os.path.join(FLAC_FOLDER, rel_path))
+        if job is None:
+            print(f"⚠️ Warning: No stems found in '{folder}'. Skipping...")
+            continue
+        yield job
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Generate CH1.als for every track folder of a STEMS folder.")
+    parser.add_argument("stems", nargs="?", default=FLAC_FOLDER,
+                        help=f"STEMS folder with <bpm>/<key>/<track> folders (default ${STEMS_ENV})")
+    parser.add_argument("--templates", default=ALS_FILES_FOLDER,
+                        help=f"Folder of the <bpm>.als templates (default ${TEMPLATES_ENV})")
+    parser.add_argument("--folder", action="append",
+                        help="Only generate this track folder, without scanning the STEMS folder (repeatable)")
+    parser.add_argument("--workers", type=int, default=batchGen.BATCH_WORKERS, help="Number of parallel workers")
+    parser.add_argument("--executor", choices=["process", "thread"], default=batchGen.BATCH_EXECUTOR)
+    parser.add_argument("--serial", action="store_true", help="Process folders one after another (no pool)")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="Overlap scan, duration probes, rendering and writes with the asyncio pipeline")
+    parser.add_argument("--full", action="store_true", help="Regenerate every folder, even if up to date")
+    parser.add_argument("--bpm", type=float, action="append", help="Only scan this BPM folder (repeatable)")
+    parser.add_argument("--key", action="append", help="Only scan this key folder, e.g. 8A (repeatable)")
+    parser.add_argument("--base-template", default=BASE_TEMPLATE,
+                        help="Derive every BPM from this template instead of alsFiles/<bpm>.als")
+    parser.add_argument("--loop-end", default=LOOP_END_STEM,
+                        help=f"Stem whose length sets the clip length, or 'longest' (default {LOOP_END_STEM})")
+    parser.add_argument("--compression", choices=sorted(alsRewrite.GZIP_PROFILES),
+                        help="Compression profile: fast (level 1) for bulk runs, default (6) or max (9, the default)")
+    parser.add_argument("--gzip-level", type=int, help="Explicit gzip level 0-9 (overrides --compression)")
+    parser.add_argument("--gzip-threads", type=int, help="Compress each set in parallel blocks with this many threads")
+    parser.add_argument("--variants", metavar="JSON", help="Variant spec: list of {output, template, stems} objects")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and generate folders as soon as their stems are complete")
+    parser.add_argument("--trim-silence", action="store_true", default=TRIM_SILENCE,
+                        help="End clips at the last non-silent audio (rounded up to a bar) instead of the file length")
+    parser.add_argument("--validate", nargs="?", const=VALIDATION_REPORT_PATH, metavar="REPORT",
+                        help=f"Check the existing sets instead of generating; writes a JSON report "
+                             f"(default {VALIDATION_REPORT_PATH})")
+    parser.add_argument("--shard", metavar="i/N",
+                        help="Only generate shard i of N (1-based), for several nodes sharing the STEMS volume")
+    parser.add_argument("--no-catalog", dest="catalog", action="store_false", default=CATALOG,
+                        help="Do not record the written sets in the set catalog (see setCatalog.py)")
+    parser.add_argument("--quiet", action="store_true", help="Turn off per-element logging")
+    parser.add_argument("--metrics", default=METRICS_PATH,
+                        help="Write a run report: JSON, or Prometheus text for *.prom / *.txt")
+    parser.add_argument("--profile", metavar="PATH", help="Profile the run with cProfile and save the stats to PATH")
+    return parser
+
+def main(argv=None, prog=None):
+    """
+    Command-line entry point (also `alsgen generate` / `alsgen validate`). Returns the exit status.
+    """
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+    if not args.stems:
+        parser.error(f"no STEMS folder: pass it as the first argument or set {STEMS_ENV}")
+    if not args.templates and not args.base_template:
+        parser.error(f"no template folder: pass --templates (or --base-template) or set {TEMPLATES_ENV}")
+    if args.shard:
+        from . import shardMode
+        try:
+            shard_spec = shardMode.parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    instrumentation.configure(quiet=args.quiet)
+    configure(FLAC_FOLDER=args.stems, ALS_FILES_FOLDER=args.templates, BASE_TEMPLATE=args.base_template,
+              TRIM_SILENCE=args.trim_silence, LOOP_END_STEM=args.loop_end, CATALOG=args.catalog,
+              compression={"level": args.gzip_level, "profile": args.compression, "threads": args.gzip_threads})
+    if args.variants:
+        configure(VARIANTS=load_variants(args.variants))
+    setup = worker_setup()
+
+    def scan():
+        if args.folder:
+            return folder_jobs(args.folder)
+        return find_flac_folders(FLAC_FOLDER, bpm=args.bpm, key=args.key)
+
+    if args.validate:
+        from . import setValidator
+        results = batchGen.run_batch(scan(), validate_folder, workers=args.workers,
+                                     executor="serial" if args.serial else args.executor, setup=setup)
+        validation = setValidator.write_report(args.validate, results, {"flac_folder": FLAC_FOLDER})
+        print(f"📄 Validation report saved to {args.validate}: {validation['sets']} sets, "
+              f"{len(validation['broken'])} broken")
+        return 1 if validation["broken"] or validation["failed"] else 0
+
+    # Jobs stream straight from the scanner, so generation starts before the scan ends
+    folders = instrumentation.timed_iter("scan", scan())
+    shard = None
+    if args.shard:
+        # Created before the manifest is read: its report file marks the run start on the shared volume
+        shard = shardMode.ShardRun(FLAC_FOLDER, *shard_spec, outputs_for_job=outputs_for_job)
+        folders = shard.owned(folders)
+        print(f"🧩 Shard {shard.index}/{shard.count} on {shard.owner}")
+    manifest = None
+    if INCREMENTAL:
+        manifest = buildManifest.BuildManifest(FLAC_FOLDER)
+        folders = buildManifest.filter_stale(manifest, folders, template_for_job, force=args.full,
+                                             variants_for_job=variants_for_job, options=build_options(),
+                                             keep_existing=SKIP_EXISTING and not args.full)
+    if shard:
+        folders = shard.locked(folders)
+
+    def report(index, result):
+        batchGen.print_job_result(index, result)
+        if shard:
+            shard.finish(result["job"], result["status"], result["seconds"], result["error"])
+        if manifest and result["status"] in ("written", "no-template"):
+            manifest.record(result["job"][0])
+
+    def ready_job(folder):
+        """
+        Watch mode: the job for a settled folder once all of its stems are fully written and it is stale.
+        """
+        job = job_for_folder(folder)
+        if job is None or not all(job[1].get(stem) for stem in watchMode.WATCH_REQUIRED_STEMS):
+            return None
+        if not watchMode.stems_complete(os.path.join(FLAC_FOLDER, rel_path) for rel_path in job[1].values()
+                                        if rel_path):
+            return None
+        jobs = [job]
+        if shard:
+            jobs = shard.owned(jobs)
+        if manifest:
+            jobs = buildManifest.filter_stale(manifest, jobs, template_for_job, force=args.full,
+                                              variants_for_job=variants_for_job, options=build_options(),
+                                              keep_existing=SKIP_EXISTING and not args.full)
+        if shard:
+            jobs = shard.locked(jobs)
+        return next(iter(jobs), None)
+
+    try:
+        with instrumentation.profiled(args.profile):
+            if args.watch:
+                from . import watchMode
+                processed = sum(watchMode.run_watch(FLAC_FOLDER, ready_job, process_folder, report=report,
+                                                    workers=args.workers, executor=args.executor,
+                                                    setup=setup).values())
+            elif args.serial:
+                processed = 0
+                for job in folders:
+                    start = time.perf_counter()
+                    status = process_folder(job)
+                    batchGen.count_result(status)
+                    processed += 1
+                    if shard:
+                        shard.finish(job, status, time.perf_counter() - start)
+                    if manifest and status in ("written", "no-template"):
+                        manifest.record(job[0])
+            elif args.pipeline:
+                from . import asyncPipeline
+                processed = len(asyncPipeline.run_pipeline(folders, probe_folder, render_folder, cpu_workers=args.workers,
+                                                           cpu_executor=args.executor, report=report, setup=setup,
+                                                           on_written=record_set))
+            else:
+                processed = len(batchGen.run_batch(folders, process_folder, workers=args.workers, executor=args.executor,
+                                                   report=report, setup=setup))
+    except BaseException:
+        if shard:
+            shard.close()
+            shard.write_report("interrupted")
+        raise
+
+    if not processed:
+        print("✅ Everything is up to date." if manifest else "❌ No relevant FLAC files found in any folder!")
+    elif args.serial:
+        print("🎵 All ALS files generated successfully!")
+    if manifest and not shard:
+        # Other nodes may still be appending to a shared manifest, so shard runs never rewrite it
+        manifest.compact()
+    instrumentation.print_summary()
+    run_info = {"flac_folder": FLAC_FOLDER, "mode": "watch" if args.watch else
+                "serial" if args.serial else "pipeline" if args.pipeline else args.executor}
+    if shard:
+        shard.close()
+        shard.write_report("finished", run_info)
+        print(f"🧩 Shard report saved to {shard.report_path} (merge with: python -m alsgen.shardMode {FLAC_FOLDER})")
+    if args.metrics:
+        instrumentation.export(args.metrics, run_info)
+        print(f"📄 Run report saved to {args.metrics}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,83 @@
+import gzip
+import os
+import uuid
+from contextlib import contextmanager
+from . import parallelGzip
+
+# 🛠 CONFIG: Output compression
+GZIP_LEVEL = 9  # Same level gzip.open() uses by default
+GZIP_THREADS = 1  # >1 compresses each set in parallel blocks (see parallelGzip.py)
+GZIP_PROFILES = {"max": 9, "default": 6, "fast": 1}  # Named levels, e.g. "fast" for bulk runs
+
+MARKER_TAGS = ("LoopEnd", "OutMarker")
+NAME_TAGS = ("MemorizedFirstClipName", "UserName", "Name", "EffectiveName")
+# What xml.sax.saxutils.escape does for attributes, without importing it (it pulls in urllib.request)
+XML_ATTR_ESCAPES = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;"})
+
+def xml_attr(value):
+    """
+    Escapes a string for use inside a double-quoted XML attribute and encodes it as UTF-8.
+    """
+    return value.translate(XML_ATTR_ESCAPES).encode("utf-8")
+
+def read_als(path):
+    """
+    Reads and decompresses an ALS file, returning the raw XML bytes.
+    """
+    with open(path, "rb") as f:
+        return gzip.decompress(f.read())
+
+def set_compression(level=None, profile=None, threads=None):
+    """
+    Applies a compression level (or named profile) and thread count for all later writes.
+    """
+    global GZIP_LEVEL, GZIP_THREADS
+    if profile is not None:
+        if profile not in GZIP_PROFILES:
+            raise ValueError(f"Unknown compression profile '{profile}' (expected one of {', '.join(GZIP_PROFILES)}).")
+        GZIP_LEVEL = GZIP_PROFILES[profile]
+    if level is not None:
+        if not 0 <= level <= 9:
+            raise ValueError(f"Invalid gzip level {level} (expected 0-9).")
+        GZIP_LEVEL = level
+    if threads is not None:
+        GZIP_THREADS = max(1, threads)
+
+def compress_als(xml_data, level=None, threads=None):
+    """
+    Gzips XML bytes into ALS file contents.
+    mtime is fixed so identical inputs give byte-identical outputs.
+    With more than one thread the block-parallel writer is used (still a single gzip member).
+    """
+    level = GZIP_LEVEL if level is None else level
+    threads = GZIP_THREADS if threads is None else threads
+    if threads > 1:
+        return parallelGzip.compress(xml_data, level, threads)
+    return gzip.compress(xml_data, compresslevel=level, mtime=0)
+
+@contextmanager
+def open_atomic(path):
+    """
+    Yields a binary file that replaces `path` atomically once the block succeeds,
+    so an interrupted run never leaves a truncated .als behind.
+    """
+    folder = os.path.dirname(path) or "."
+    tmp_path = os.path.join(folder, f".{os.path.basename(path)}.{uuid.uuid4().hex}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def write_atomic(path, data):
+    """
+    Writes `data` to `path` through a temp file in the same folder and an atomic rename.
+    """
+    with open_atomic(path) as f:
+        f.write(data)
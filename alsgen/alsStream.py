@@ -0,0 +1,218 @@
+import gzip
+import re
+import xml.parsers.expat
+from . import alsRewrite
+
+# ✅ CONFIG: Streaming XML edits
+STREAM_CHUNK_SIZE = 256 * 1024  # Decompressed bytes fed to the parser at a time
+
+# Sample references collected inside an edit scope, so a rule can tell which FLAC a clip plays
+SAMPLE_TAGS = ("Path", "RelativePath", "BrowserContentPath")
+
+def _compile_path(path):
+    """
+    Compiles a structural path such as "AudioTrack/**/AudioClip/Loop/LoopEnd" into a regex
+    over the "/"-joined element stack. "*" matches one element, "**" any number of them,
+    and a path without a leading "/" may start at any depth.
+    """
+    parts = []
+    for part in path.strip("/").split("/"):
+        if part == "**":
+            parts.append("(?:[^/]+/)*")
+        else:
+            parts.append(("[^/]+" if part == "*" else re.escape(part)) + "/")
+    prefix = "^" if path.startswith("/") else "(?:^|/)"
+    return re.compile(prefix + "".join(parts)[:-1] + "$")
+
+def rule(path, value, attr="Value", scope=None, when=None, collect=SAMPLE_TAGS):
+    """
+    Describes one edit: set `attr` of every element matching `path` to `value`.
+    `value` is a string, or a callable (old_value, scope) returning the new string or None to keep it.
+    With `scope` (an enclosing element name, e.g. "AudioClip") the edit is decided when that
+    element closes, so `when(scope)` can look at content that comes after the edited element:
+    scope["attrs"] are the scope element's attributes and scope["values"] maps each `collect`
+    tag found inside it to the list of its Value attributes.
+    """
+    return {
+        "path": path,
+        "pattern": _compile_path(path),
+        "tag": path.rstrip("/").rsplit("/", 1)[-1],
+        "value": value,
+        "attr": attr,
+        "attr_pattern": re.compile(rb'\s' + attr.encode() + rb'="([^"]*)"'),
+        "scope": scope,
+        "when": when,
+        "collect": frozenset(collect) if scope else frozenset(),
+    }
+
+def in_stem_clip(classify):
+    """
+    `when` predicate for AudioClip-scoped rules: true if the clip plays a FLAC that `classify` maps to a stem.
+    """
+    def when(scope):
+        for values in scope["values"].values():
+            for value in values:
+                name = value.replace("\\", "/").rsplit("/", 1)[-1]
+                if name.lower().endswith(".flac") and classify(name):
+                    return True
+        return False
+    return when
+
+class StreamEditor:
+    """
+    Single-pass, scope-aware attribute editor over raw XML bytes.
+    Input is fed in chunks and passed through to `write` untouched except for the edited
+    attribute values. Output is only held back while a scoped edit is undecided (at most
+    one scope element, e.g. one AudioClip), so memory stays flat whatever the file size.
+    """
+
+    def __init__(self, rules, write=None):
+        self.write = write
+        self.by_tag = {}
+        self.collect = {}  # scope name -> tags whose values are collected
+        for r in rules:
+            self.by_tag.setdefault(r["tag"], []).append(r)
+            if r["scope"]:
+                self.collect.setdefault(r["scope"], set()).update(r["collect"])
+        self.counts = {r["path"]: 0 for r in rules}
+        self.matches = []  # (start, end, rule, new_value, scope) of every accepted edit
+        self.buffer = bytearray()
+        self.base = 0  # Absolute offset of buffer[0]
+        self.stack = []
+        self.scopes = []  # Open scope elements, innermost last
+        self.edits = []  # Accepted (start, end, new_value) not written yet
+        self.parser = xml.parsers.expat.ParserCreate()
+        self.parser.StartElementHandler = self._start
+        self.parser.EndElementHandler = self._end
+
+    def _start(self, name, attrs):
+        self.stack.append(name)
+        if name in self.collect:
+            self.scopes.append({"name": name, "attrs": attrs, "values": {}, "depth": len(self.stack), "pending": []})
+        for scope in self.scopes:
+            if name in self.collect[scope["name"]] and "Value" in attrs:
+                scope["values"].setdefault(name, []).append(attrs["Value"])
+        rules = self.by_tag.get(name)
+        if not rules:
+            return
+        path = "/".join(self.stack)
+        for r in rules:
+            old = attrs.get(r["attr"])
+            if old is None or not r["pattern"].search(path):
+                continue
+            # The tag is fully parsed, so its bytes are still in the buffer
+            match = r["attr_pattern"].search(self.buffer, self.parser.CurrentByteIndex - self.base)
+            edit = (self.base + match.start(1), self.base + match.end(1), r, old)
+            if not r["scope"]:
+                self._accept(edit, None)
+                continue
+            scope = next((s for s in reversed(self.scopes) if s["name"] == r["scope"]), None)
+            if scope is not None:
+                scope["pending"].append(edit)
+
+    def _end(self, name):
+        if self.scopes and self.scopes[-1]["depth"] == len(self.stack):
+            scope = self.scopes.pop()
+            for edit in scope["pending"]:
+                when = edit[2]["when"]
+                if when is None or when(scope):
+                    self._accept(edit, scope)
+        self.stack.pop()
+
+    def _accept(self, edit, scope):
+        start, end, r, old = edit
+        value = r["value"](old, scope) if callable(r["value"]) else r["value"]
+        if value is None:
+            return
+        new = alsRewrite.xml_attr(value)
+        self.edits.append((start, end, new))
+        self.matches.append((start, end, r, new, scope))
+        self.counts[r["path"]] += 1
+
+    def _hold(self):
+        """
+        Absolute offset before which the output is final.
+        """
+        hold = self.base + len(self.buffer)
+        # A tag cut by the chunk boundary has not been parsed yet ("<" cannot occur in attribute values)
+        last_tag = self.buffer.rfind(b"<")
+        if last_tag >= 0:
+            hold = self.base + last_tag
+        for scope in self.scopes:
+            if scope["pending"]:
+                hold = min(hold, scope["pending"][0][0])
+        return hold
+
+    def _flush(self, upto):
+        if upto <= self.base:
+            return
+        if self.write:
+            self.edits.sort()
+            last = self.base
+            while self.edits and self.edits[0][1] <= upto:
+                start, end, new = self.edits.pop(0)
+                self.write(bytes(self.buffer[last - self.base:start - self.base]))
+                self.write(new)
+                last = end
+            self.write(bytes(self.buffer[last - self.base:upto - self.base]))
+        del self.buffer[:upto - self.base]
+        self.base = upto
+
+    def feed(self, data, final=False):
+        """
+        Parses the next chunk and writes out everything that can no longer change.
+        """
+        self.buffer += data
+        self.parser.Parse(data, final)
+        self._flush(self.base + len(self.buffer) if final else self._hold())
+
+def edit_stream(read, write, rules, chunk_size=None):
+    """
+    Applies `rules` while copying XML from `read(n)` to `write(data)` in one pass.
+    Returns (counts per rule path, accepted matches).
+    """
+    editor = StreamEditor(rules, write)
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    while True:
+        data = read(chunk_size)
+        editor.feed(data, final=not data)
+        if not data:
+            return editor.counts, editor.matches
+
+def edit_bytes(xml_data, rules):
+    """
+    Applies `rules` to in-memory XML bytes. Returns (xml_data, counts).
+    """
+    parts = []
+    editor = StreamEditor(rules, parts.append)
+    editor.feed(xml_data, final=True)
+    return b"".join(parts), editor.counts
+
+def find_matches(xml_data, rules):
+    """
+    Returns the accepted matches of `rules` as (start, end, rule, new_value, scope), without writing anything.
+    """
+    editor = StreamEditor(rules)
+    editor.feed(xml_data, final=True)
+    return editor.matches
+
+class _Unchanged(Exception):
+    pass
+
+def edit_als(input_path, output_path, rules, level=None, only_changed=False):
+    """
+    Streams a gzipped .als through the editor into a new .als, written atomically,
+    without ever holding the whole document in memory. Returns the counts per rule path.
+    With `only_changed`, nothing is written when no rule edited anything (so `output_path`
+    may be `input_path` and an unaffected set keeps its file and mtime).
+    """
+    try:
+        with gzip.open(input_path, "rb") as source, alsRewrite.open_atomic(output_path) as target:
+            with gzip.GzipFile(fileobj=target, mode="wb", mtime=0, filename="",
+                               compresslevel=alsRewrite.GZIP_LEVEL if level is None else level) as output:
+                counts, _ = edit_stream(source.read, output.write, rules)
+            if only_changed and not any(counts.values()):
+                raise _Unchanged  # open_atomic() drops the temp file
+    except _Unchanged:
+        pass
+    return counts
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from . import alsRewrite
+from . import batchGen
+from . import instrumentation
+
+# ✅ CONFIG: Async pipeline (scan -> probe -> render -> write)
+PIPELINE_QUEUE_SIZE = 16  # Max items waiting between two stages (backpressure bound)
+PIPELINE_IO_WORKERS = 8  # Concurrent blocking reads/writes, e.g. on a NAS-mounted STEMS share
+PIPELINE_CPU_WORKERS = os.cpu_count() or 1  # Render/compress workers
+PIPELINE_CPU_EXECUTOR = "process"  # "process" or "thread" (zlib releases the GIL while compressing)
+PIPELINE_REPORT_INTERVAL = 5.0  # Seconds between queue-depth reports (0 disables)
+
+_DONE = object()
+
+def _result(item, status, error=None):
+    index, job, started, _ = item
+    return {"index": index, "job": job, "status": status, "error": error, "log": "",
+            "seconds": time.perf_counter() - started}
+
+async def _scan(jobs, out_queue, pool, consumers):
+    """
+    Pulls jobs from a (blocking) iterator in the I/O pool; put() blocks while the probe stage is
+    behind, so the scanner never runs more than PIPELINE_QUEUE_SIZE folders ahead.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(jobs)
+    index = 0
+    while True:
+        job = await loop.run_in_executor(pool, next, iterator, _DONE)
+        if job is _DONE:
+            break
+        await out_queue.put((index, job, time.perf_counter(), None))
+        index += 1
+    for _ in range(consumers):
+        await out_queue.put(_DONE)
+
+async def _stage(func, in_queue, out_queue, pool, consumers, next_consumers, finish, with_metrics=False):
+    """
+    Runs `consumers` tasks that apply `func` to each item's payload in `pool`.
+    A string returned by `func` is a final status; exceptions mark the job as failed.
+    `with_metrics` runs `func` through instrumentation.call_with_metrics (process pools)
+    and merges the worker's metrics here.
+    """
+    loop = asyncio.get_running_loop()
+    if with_metrics:
+        func = partial(instrumentation.call_with_metrics, func)
+
+    async def consume():
+        while True:
+            item = await in_queue.get()
+            if item is _DONE:
+                return
+            index, job, started, payload = item
+            try:
+                value = await loop.run_in_executor(pool, func, payload if payload is not None else job)
+            except Exception as e:
+                instrumentation.merge(getattr(e, "metrics", None))
+                finish(_result(item, "failed", f"{e.__class__.__name__}: {e}"))
+                continue
+            if with_metrics:
+                value, metrics = value
+                instrumentation.merge(metrics)
+            if isinstance(value, str) or out_queue is None:
+                finish(_result(item, value if isinstance(value, str) else "written"))
+            else:
+                await out_queue.put((index, job, started, value))
+
+    await asyncio.gather(*(consume() for _ in range(consumers)))
+    if out_queue is not None:
+        for _ in range(next_consumers):
+            await out_queue.put(_DONE)
+
+def _write(payload, on_written=None):
+    outputs = payload if isinstance(payload, list) else [payload]
+    for output_path, als_data, *extra in outputs:
+        with instrumentation.timer("write"):
+            alsRewrite.write_atomic(output_path, als_data)
+        instrumentation.count("bytes_out", len(als_data))
+        if on_written and extra:
+            on_written(output_path, extra[0])
+
+async def _monitor(queues, results, interval):
+    while True:
+        await asyncio.sleep(interval)
+        depths = " ".join(f"{name}={queue.qsize()}/{queue.maxsize}" for name, queue in queues.items())
+        print(f"📈 queues: {depths} | done: {len(results)}")
+
+async def _run(jobs, probe, render, io_workers, cpu_workers, cpu_executor, report, setup, on_written):
+    io_pool = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="alsGen-io")
+    if cpu_executor == "process":
+        cpu_pool = ProcessPoolExecutor(max_workers=cpu_workers, **batchGen.pool_options(setup))
+    else:
+        cpu_pool = ThreadPoolExecutor(max_workers=cpu_workers, thread_name_prefix="alsGen-cpu")
+    queues = {name: asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE) for name in ("probe", "render", "write")}
+    results = []
+
+    def finish(result):
+        batchGen.count_result(result["status"])
+        if report:
+            report(len(results), result)
+        results.append(result)
+
+    monitor = None
+    if PIPELINE_REPORT_INTERVAL:
+        monitor = asyncio.create_task(_monitor(queues, results, PIPELINE_REPORT_INTERVAL))
+    try:
+        await asyncio.gather(
+            _scan(jobs, queues["probe"], io_pool, io_workers),
+            _stage(probe, queues["probe"], queues["render"], io_pool, io_workers, cpu_workers, finish),
+            _stage(render, queues["render"], queues["write"], cpu_pool, cpu_workers, io_workers, finish,
+                   with_metrics=cpu_executor == "process"),
+            _stage(partial(_write, on_written=on_written), queues["write"], None, io_pool, io_workers, 0, finish),
+        )
+    finally:
+        if monitor:
+            monitor.cancel()
+        io_pool.shutdown()
+        cpu_pool.shutdown()
+    return results
+
+def print_pipeline_result(index, result):
+    line = f"[{index + 1}] {result['status']} in {result['seconds']:.2f}s – {result['job'][0]}"
+    if result["error"]:
+        line += f" ({result['error']})"
+    print(line)
+
+def run_pipeline(jobs, probe, render, io_workers=None, cpu_workers=None, cpu_executor=None,
+                 report=print_pipeline_result, setup=None, on_written=None):
+    """
+    Generates sets through bounded asyncio queues so folder scans, FLAC/template reads,
+    CPU-bound rendering/compression and writes all overlap.
+    `probe(job)` runs in the I/O pool and returns a render task (or a status string);
+    `render(task)` runs in the CPU pool and returns (output_path, als_data), or a list of them for several
+    sets per job, written atomically in the I/O pool. An item may carry a third value, passed to
+    `on_written(output_path, value)` in the I/O pool once that set is written.
+    Both must be module-level functions. Results are reported as jobs finish and returned as a list.
+    `setup` is passed to batchGen.init_worker() in process workers.
+    """
+    io_workers = io_workers or PIPELINE_IO_WORKERS
+    cpu_workers = cpu_workers or PIPELINE_CPU_WORKERS
+    cpu_executor = cpu_executor or PIPELINE_CPU_EXECUTOR
+    start = time.perf_counter()
+    results = asyncio.run(_run(jobs, probe, render, io_workers, cpu_workers, cpu_executor, report, setup, on_written))
+    results.sort(key=lambda result: result["index"])
+    batchGen.print_batch_summary(results, time.perf_counter() - start, cpu_workers, f"{cpu_executor} (pipeline)")
+    return results
@@ -0,0 +1,160 @@
+import io
+import os
+import time
+import traceback
+from collections import Counter, deque
+from contextlib import redirect_stdout
+from . import instrumentation
+
+# ✅ CONFIG: Worker pool
+BATCH_WORKERS = os.cpu_count() or 1  # Number of folders processed in parallel
+BATCH_EXECUTOR = "process"  # "process" (default) or "thread"
+BATCH_WINDOW = 4  # Jobs kept in flight per worker (bounds memory for huge libraries)
+
+def _run_job(worker, job, capture):
+    """
+    Runs a single job inside a pool worker and returns a result dict.
+    Exceptions never escape, so one broken folder cannot stop the batch.
+    When `capture` is set (process pools), everything the job prints is returned as its log
+    and the job's instrumentation metrics are returned for the parent to merge.
+    A worker may return a dict with a "status" key instead of a status string; the dict is
+    passed back as the result's "details".
+    """
+    start = time.perf_counter()
+    log = io.StringIO()
+    status, error, details = "failed", None, None
+    if capture:
+        instrumentation.reset()
+    try:
+        if capture:
+            with redirect_stdout(log):
+                status = worker(job)
+        else:
+            status = worker(job)
+    except Exception as e:
+        error = f"{e.__class__.__name__}: {e}"
+        log.write(traceback.format_exc())
+    if isinstance(status, dict):
+        details, status = status, status.get("status")
+    return {
+        "job": job,
+        "status": status or "failed",
+        "error": error,
+        "log": log.getvalue(),
+        "seconds": time.perf_counter() - start,
+        "metrics": instrumentation.snapshot() if capture else None,
+        "details": details,
+    }
+
+def print_job_result(index, result):
+    """
+    Default per-job reporter: replays the job's log and a one-line status.
+    """
+    if result["log"]:
+        print(result["log"], end="")
+    folder = result["job"][0]
+    line = f"[{index + 1}] {result['status']} in {result['seconds']:.2f}s – {folder}"
+    if result["error"]:
+        line += f" ({result['error']})"
+    print(line)
+
+def init_worker(quiet, setup=None):
+    """
+    Process-pool initializer. Workers started with "spawn" re-import every module and would see the
+    defaults, so the run options are applied again: quiet mode, and `setup` = (func, kwargs),
+    e.g. (alsGen.configure, {"stems": ...}).
+    """
+    instrumentation.configure(quiet=quiet)
+    if setup:
+        setup[0](**setup[1])
+
+def pool_options(setup=None):
+    """
+    Keyword arguments for a ProcessPoolExecutor whose workers inherit the run options.
+    """
+    return {"initializer": init_worker, "initargs": (instrumentation.QUIET, setup)}
+
+def run_batch(jobs, worker, workers=None, executor=None, report=print_job_result, setup=None):
+    """
+    Runs `worker(job)` for every job in a worker pool.
+    `jobs` may be any iterable (including a generator); at most
+    `workers * BATCH_WINDOW` jobs are in flight at once.
+    `worker` must be a module-level function returning a status string
+    ("written", "skipped", "failed", ...).
+    Results are reported in submission order and returned as a list.
+    `setup` is passed to init_worker() in process workers. The "serial" executor runs the jobs
+    in this process without a pool (short runs such as a single folder).
+    """
+    workers = workers or BATCH_WORKERS
+    executor = executor or BATCH_EXECUTOR
+    results = []
+
+    def finish(result):
+        instrumentation.merge(result["metrics"])
+        count_result(result["status"])
+        if report:
+            report(len(results), result)
+        results.append(result)
+
+    start = time.perf_counter()
+    if executor == "serial":
+        for job in jobs:
+            finish(_run_job(worker, job, False))
+        print_batch_summary(results, time.perf_counter() - start, 1, executor)
+        return results
+
+    # Imported here: loading multiprocessing costs more than a single-folder run
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    if executor == "process":
+        pool_class, capture = ProcessPoolExecutor, True
+        options = pool_options(setup)
+    elif executor == "thread":
+        # redirect_stdout is process-wide, so thread jobs print directly
+        pool_class, capture, options = ThreadPoolExecutor, False, {}
+    else:
+        raise ValueError(f"Unknown executor '{executor}' (expected 'process', 'thread' or 'serial').")
+
+    window = max(1, workers * BATCH_WINDOW)
+    pending = deque()
+
+    def collect():
+        job, future = pending.popleft()
+        try:
+            result = future.result()
+        except Exception as e:  # e.g. a worker process died
+            result = {"job": job, "status": "failed", "error": f"{e.__class__.__name__}: {e}",
+                      "log": "", "seconds": 0.0, "metrics": None, "details": None}
+        finish(result)
+
+    with pool_class(max_workers=workers, **options) as pool:
+        for job in jobs:
+            pending.append((job, pool.submit(_run_job, worker, job, capture)))
+            while len(pending) >= window or (pending and pending[0][1].done()):
+                collect()
+        while pending:
+            collect()
+    print_batch_summary(results, time.perf_counter() - start, workers, executor)
+    return results
+
+def count_result(status):
+    """
+    Adds a finished job to the instrumentation counters (folders, written, skipped, failed, ...).
+    """
+    instrumentation.count("folders")
+    instrumentation.count(status)
+
+def print_batch_summary(results, elapsed, workers, executor):
+    """
+    Prints throughput and failure statistics for a finished batch.
+    """
+    counts = Counter(result["status"] for result in results)
+    rate = len(results) / elapsed if elapsed > 0 else 0.0
+    print("\n📊 Batch summary")
+    print(f"   Jobs: {len(results)} in {elapsed:.2f}s ({rate:.2f} folders/s, {workers} {executor} workers)")
+    for status, count in sorted(counts.items()):
+        print(f"   {status}: {count}")
+    failed = [result for result in results if result["status"] == "failed"]
+    if failed:
+        print("❌ Failed folders:")
+        for result in failed:
+            print(f"   {result['job'][0]}" + (f" ({result['error']})" if result["error"] else ""))
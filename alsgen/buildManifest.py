@@ -0,0 +1,172 @@
+import hashlib
+import json
+import os
+from . import alsRewrite
+from . import stemScanner
+from . import templateCache
+
+# ✅ CONFIG: Incremental rebuilds
+MANIFEST_NAME = ".alsGen-manifest.jsonl"  # Stored at the root of the STEMS folder
+GENERATOR_VERSION = 4  # Bump whenever generated sets change, to rebuild everything once
+
+DIGEST_SAMPLE_BYTES = 64 * 1024  # Head and tail bytes hashed per stem
+
+def stem_digest(path, size):
+    """
+    Content fingerprint of a stem: BLAKE2b over its size and first/last 64 KiB.
+    Only computed when a stem's size or mtime changed, to tell real edits from touches.
+    """
+    digest = hashlib.blake2b(str(size).encode(), digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(DIGEST_SAMPLE_BYTES))
+        if size > 2 * DIGEST_SAMPLE_BYTES:
+            f.seek(-DIGEST_SAMPLE_BYTES, os.SEEK_END)
+            digest.update(f.read(DIGEST_SAMPLE_BYTES))
+    return digest.hexdigest()
+
+class BuildManifest:
+    """
+    Append-only JSON-lines record of what each track folder's set was built from:
+    stem size/mtime/digest, template hash and generator version.
+    Later lines override earlier ones; compact() rewrites one line per folder.
+    """
+
+    def __init__(self, root, path=None):
+        self.root = root
+        self.path = path or os.path.join(root, MANIFEST_NAME)
+        self.records = {}
+        self.pending = {}
+        self._template_hashes = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line from an interrupted run
+                    self.records[record["folder"]] = record
+        except FileNotFoundError:
+            pass
+
+    def _template_hash(self, template_path):
+        if template_path not in self._template_hashes:
+            self._template_hashes[template_path] = templateCache.template_fingerprint(template_path)
+        return self._template_hashes[template_path]
+
+    def check(self, folder, track_names, template_path, output_name="CH1.als", variants=None, options=None,
+              keep_existing=False):
+        """
+        Decides whether a folder's set must be rebuilt, using only stat() calls
+        unless a stem's size/mtime changed. Returns a reason string, or None if up to date.
+        `variants` optionally lists (output_name, template_path, stems) for every set written per
+        folder; a change to any of them (or its template) triggers a rebuild.
+        `options` optionally holds run options that change the output (e.g. silence trimming).
+        With `keep_existing`, a folder without a record whose sets already exist (made before the
+        manifest, possibly edited by hand) is recorded as built from the current inputs and kept.
+        The would-be record is kept in self.pending until record() confirms the build.
+        """
+        key = os.path.relpath(folder, self.root)
+        old = self.records.get(key)
+        old_stems = old["stems"] if old else {}
+        stems = {}
+        changed = old is None
+        touched = False
+        for rel_path in track_names.values():
+            if not rel_path:
+                continue
+            stat = stemScanner.stat(os.path.join(self.root, rel_path))
+            name = os.path.basename(rel_path)
+            previous = old_stems.get(name)
+            if previous and previous[0] == stat.st_size and previous[1] == stat.st_mtime_ns:
+                stems[name] = previous
+                continue
+            digest = stem_digest(os.path.join(self.root, rel_path), stat.st_size)
+            stems[name] = [stat.st_size, stat.st_mtime_ns, digest]
+            if not previous or previous[2] != digest:
+                changed = True
+            elif previous[1] // 10**9 != stat.st_mtime_ns // 10**9:
+                touched = True  # same content, but sets store the stem's modification date (LastModDate)
+
+        record = {
+            "folder": key,
+            "output": output_name,
+            "stems": stems,
+            "template": os.path.basename(template_path) if template_path else None,
+            "template_sha1": self._template_hash(template_path) if template_path else None,
+            "version": GENERATOR_VERSION,
+        }
+        outputs = [output_name]
+        if variants is not None:
+            record["variants"] = [
+                [name, os.path.basename(path) if path else None, self._template_hash(path) if path else None,
+                 sorted(stems) if stems is not None else None]
+                for name, path, stems in variants
+            ]
+            outputs = [name for name, path, _ in variants if path]
+        if options:
+            record["options"] = options
+        self.pending[folder] = record
+
+        if old is None:
+            if keep_existing and template_path and all(os.path.exists(os.path.join(folder, name)) for name in outputs):
+                self.record(folder)
+                print(f"⏭️ Keeping existing {', '.join(outputs)} in '{folder}' (not in the manifest; --full rebuilds it)")
+                return None
+            return "new folder"
+        if changed or set(stems) != set(old_stems):
+            return "stems changed"
+        if touched:
+            return "stems touched"
+        if old.get("version") != GENERATOR_VERSION:
+            return "generator version changed"
+        if old.get("template") != record["template"] or old.get("template_sha1") != record["template_sha1"]:
+            return "template changed"
+        if old.get("variants") != record.get("variants"):
+            return "variants changed"
+        if old.get("options") != record.get("options"):
+            return "options changed"
+        if template_path and not all(os.path.exists(os.path.join(folder, name)) for name in outputs):
+            return "output missing"
+        if stems != old_stems:
+            self.record(folder)  # only touched: refresh stat data so the next run stays stat-only
+        return None
+
+    def record(self, folder):
+        """
+        Stores the pending record of a successfully built folder (appended immediately).
+        """
+        record = self.pending.pop(folder, None)
+        if record is None:
+            return
+        self.records[record["folder"]] = record
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def compact(self):
+        """
+        Rewrites the manifest with one line per folder.
+        """
+        lines = "".join(json.dumps(r, separators=(",", ":")) + "\n" for r in self.records.values())
+        alsRewrite.write_atomic(self.path, lines.encode("utf-8"))
+
+def filter_stale(manifest, jobs, template_for_job, force=False, variants_for_job=None, options=None,
+                 keep_existing=False):
+    """
+    Yields only the jobs whose inputs changed since their last build (every job if `force`).
+    `template_for_job(job)` returns the template path for a (folder, track_names, bpm_value) job;
+    `variants_for_job(job)`, if given, its (output_name, template_path, stems) variant list.
+    `options` and `keep_existing` are passed on to BuildManifest.check.
+    """
+    for job in jobs:
+        folder, track_names = job[0], job[1]
+        template_path = template_for_job(job)
+        variants = variants_for_job(job) if variants_for_job else None
+        try:
+            reason = manifest.check(folder, track_names, template_path, variants=variants, options=options,
+                                    keep_existing=keep_existing)
+        except OSError as e:
+            reason = f"unreadable input ({e})"
+        if reason or force:
+            if reason:
+                print(f"🔁 {folder}: {reason}")
+            yield job
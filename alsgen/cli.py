@@ -0,0 +1,86 @@
+"""
+alsgen command line: generate | validate | scan | catalog | relocate.
+
+Subcommands are dispatched before anything else is imported, and each one imports only the
+modules it runs, so `alsgen scan` never loads the generator and a single-folder generate
+never loads asyncio, the watcher or the audio libraries.
+"""
+import sys
+
+COMMANDS = {
+    "generate": "Generate sets for every track folder of a STEMS folder (or only --folder ones)",
+    "validate": "Check the generated sets and write a JSON report",
+    "scan": "List the track folders of a STEMS folder and the stem in each template slot",
+    "catalog": "Index existing sets and query the set catalog (index, sets, uses, missing)",
+    "relocate": "Point existing sets at stems that moved (old=new path prefixes), in place",
+}
+
+def usage():
+    lines = ["usage: alsgen {generate,validate,scan,catalog,relocate} ...", "", "commands:"]
+    lines += [f"  {name:<10} {text}" for name, text in COMMANDS.items()]
+    lines += ["", "Run 'alsgen <command> --help' for the options of a command."]
+    return "\n".join(lines)
+
+def generate(argv):
+    from . import alsGen
+    return alsGen.main(argv, prog="alsgen generate")
+
+def validate(argv):
+    import argparse
+    from . import alsGen
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument("--report", default=alsGen.VALIDATION_REPORT_PATH)
+    args, rest = parser.parse_known_args(argv)
+    return alsGen.main(rest + ["--validate", args.report], prog="alsgen validate")
+
+def scan(argv):
+    import argparse
+    import json
+    import os
+    from . import stemClassifier
+    from . import stemScanner
+    parser = argparse.ArgumentParser(prog="alsgen scan", description=COMMANDS["scan"])
+    parser.add_argument("stems", help="STEMS folder with <bpm>/<key>/<track> folders")
+    parser.add_argument("--bpm", type=float, action="append", help="Only scan this BPM folder (repeatable)")
+    parser.add_argument("--key", action="append", help="Only scan this key folder, e.g. 8A (repeatable)")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per track folder")
+    args = parser.parse_args(argv)
+
+    folders = 0
+    for folder, bpm_value, key_value, flac_entries in stemScanner.scan_track_folders(args.stems, args.bpm, args.key):
+        track_names = stemClassifier.classify_folder(flac_entries)
+        if not any(track_names.values()):
+            continue
+        folders += 1
+        if args.json:
+            print(json.dumps({"folder": folder, "bpm": bpm_value, "key": key_value, "stems": track_names}))
+        else:
+            found = ", ".join(slot for slot, name in track_names.items() if name)
+            print(f"🎯 {os.path.relpath(folder, args.stems)} (BPM: {bpm_value}): {found}")
+    if not args.json:
+        print(f"📂 {folders} track folder(s) with stems in {args.stems}")
+    return 0
+
+def catalog(argv):
+    from . import setCatalog
+    return setCatalog.main(argv, prog="alsgen catalog")
+
+def relocate(argv):
+    from . import relocateSets
+    return relocateSets.main(argv, prog="alsgen relocate")
+
+HANDLERS = {"generate": generate, "validate": validate, "scan": scan, "catalog": catalog, "relocate": relocate}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    handler = HANDLERS.get(argv[0])
+    if handler is None:
+        print(f"alsgen: unknown command '{argv[0]}'\n\n{usage()}", file=sys.stderr)
+        return 2
+    return handler(argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(main())
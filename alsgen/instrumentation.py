@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# ✅ CONFIG: Instrumentation
+QUIET = False  # True turns off per-element logging (every LoopEnd/OutMarker update, every duration line)
+
+_lock = threading.Lock()
+_timers = {}  # stage -> [calls, seconds]
+_counters = Counter()
+
+def configure(quiet=None):
+    """
+    Applies run options; also used as the process-pool initializer so workers inherit them.
+    """
+    global QUIET
+    if quiet is not None:
+        QUIET = quiet
+
+def detail(message):
+    """
+    Per-element log line, silenced in quiet mode.
+    """
+    if not QUIET:
+        print(message)
+
+@contextmanager
+def timer(stage):
+    """
+    Adds the wall time of the block to `stage`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            entry = _timers.setdefault(stage, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+def timed_iter(stage, iterable):
+    """
+    Yields from `iterable`, timing only the time spent producing each item (e.g. the folder scan).
+    """
+    iterator = iter(iterable)
+    while True:
+        with timer(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+def count(name, n=1):
+    with _lock:
+        _counters[name] += n
+
+def snapshot():
+    with _lock:
+        return {"timers": {k: list(v) for k, v in _timers.items()}, "counters": dict(_counters)}
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+def merge(data):
+    """
+    Adds a snapshot taken in another process (e.g. a pool worker) to this process's totals.
+    """
+    if not data:
+        return
+    with _lock:
+        for stage, (calls, seconds) in data["timers"].items():
+            entry = _timers.setdefault(stage, [0, 0.0])
+            entry[0] += calls
+            entry[1] += seconds
+        _counters.update(data["counters"])
+
+def call_with_metrics(func, arg):
+    """
+    Runs `func(arg)` in a pool worker process and returns (result, metrics of that call),
+    so the parent can merge per-job metrics.
+    """
+    reset()
+    try:
+        result = func(arg)
+    except Exception as e:
+        e.metrics = snapshot()
+        raise
+    return result, snapshot()
+
+def report(extra=None):
+    data = snapshot()
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "stages": {stage: {"calls": calls, "seconds": round(seconds, 6)}
+                   for stage, (calls, seconds) in sorted(data["timers"].items())},
+        "counters": dict(sorted(data["counters"].items())),
+        **(extra or {}),
+    }
+
+def export(path, extra=None):
+    """
+    Writes the run report to `path`: Prometheus text format for *.prom / *.txt, JSON otherwise.
+    """
+    data = report(extra)
+    if os.path.splitext(path)[1] in (".prom", ".txt"):
+        lines = [
+            "# HELP alsgen_stage_seconds_total Wall time spent per generation stage.",
+            "# TYPE alsgen_stage_seconds_total counter",
+        ]
+        lines += [f'alsgen_stage_seconds_total{{stage="{s}"}} {v["seconds"]}' for s, v in data["stages"].items()]
+        lines += ["# HELP alsgen_stage_calls_total Number of times each stage ran.",
+                  "# TYPE alsgen_stage_calls_total counter"]
+        lines += [f'alsgen_stage_calls_total{{stage="{s}"}} {v["calls"]}' for s, v in data["stages"].items()]
+        for name, value in data["counters"].items():
+            metric = "alsgen_" + name.replace("-", "_") + "_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        text = "\n".join(lines) + "\n"
+    else:
+        text = json.dumps(data, indent=2) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def print_summary():
+    data = snapshot()
+    if not data["timers"] and not data["counters"]:
+        return
+    print("⏱️ Stage timings")
+    for stage, (calls, seconds) in sorted(data["timers"].items(), key=lambda item: -item[1][1]):
+        print(f"   {stage:<14} {seconds:9.3f}s  {calls:7d} calls  {seconds / calls * 1000:9.3f} ms/call")
+    if data["counters"]:
+        print("   " + ", ".join(f"{k}={v}" for k, v in sorted(data["counters"].items())))
+
+@contextmanager
+def profiled(path):
+    """
+    Runs the block under cProfile and dumps the stats to `path` (no-op when `path` is None).
+    Only this process is profiled; use --serial or --executor thread to include job work.
+    """
+    if not path:
+        yield
+        return
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"🔬 Profile saved to {path} (inspect with: python -m pstats {path})")
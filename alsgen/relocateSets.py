@@ -0,0 +1,193 @@
+import argparse
+import gzip
+import os
+import posixpath
+import sys
+import time
+from collections import Counter
+from urllib.parse import quote, unquote
+from . import alsRewrite
+from . import alsStream
+from . import batchGen
+from . import setValidator
+from . import stemScanner
+
+# ✅ CONFIG: Relocating existing sets
+USER_FOLDER = "userfolder:"  # BrowserContentPath scheme of the STEMS user folder (see alsGen.sample_refs)
+
+def parse_mapping(pairs):
+    """
+    Turns "OLD=NEW" prefix pairs into [(old, new)] absolute paths, longest old prefix first.
+    """
+    mapping = []
+    for pair in pairs:
+        old, sep, new = pair.partition("=")
+        if not sep or not old or not new:
+            raise ValueError(f"Invalid prefix mapping '{pair}' (expected OLD=NEW).")
+        mapping.append((os.path.abspath(old).replace(os.sep, "/"), os.path.abspath(new).replace(os.sep, "/")))
+    return sorted(mapping, key=lambda item: len(item[0]), reverse=True)
+
+def map_path(path, mapping):
+    """
+    New location of `path` under the first matching old prefix (whole folder names only), or None.
+    """
+    for old, new in mapping:
+        if path == old or path.startswith(old + "/"):
+            return new + path[len(old):]
+    return None
+
+def map_url(url, mapping):
+    """
+    Relocated "userfolder:<root>#<part>:<part>" browser path, or None if the file did not move.
+    The user folder root moves with its prefix; a file moved out of it gets its own folder as root.
+    """
+    if not url.startswith(USER_FOLDER) or "#" not in url:
+        return None
+    root, _, rest = url[len(USER_FOLDER):].partition("#")
+    path = map_path("/".join([root] + [unquote(part) for part in rest.split(":") if part]), mapping)
+    if path is None:
+        return None
+    root = map_path(root, mapping) or root
+    if not path.startswith(root + "/"):
+        root = posixpath.dirname(path)
+    return f"{USER_FOLDER}{root}#" + ":".join(quote(part, safe="'") for part in path[len(root) + 1:].split("/"))
+
+def relocation_rules(mapping, set_folder):
+    """
+    Edit rules that move every file reference of a set saved in `set_folder`: Path, the
+    RelativePath from the set (only where Live resolves it against the set's folder) and the
+    browser path. Values that do not change are kept as they are.
+    """
+    set_folder = os.path.abspath(set_folder).replace(os.sep, "/")
+
+    def relative_path(old, scope):
+        values = scope["values"]
+        if values.get("RelativePathType", [""])[0] not in setValidator.RELATIVE_PATH_TYPES:
+            return None
+        path = map_path(values.get("Path", [""])[0], mapping)
+        if path is None:
+            return None
+        new = posixpath.relpath(path, set_folder)
+        return new if new != old else None
+
+    return [
+        alsStream.rule("FileRef/Path", lambda old, scope: map_path(old, mapping)),
+        alsStream.rule("FileRef/RelativePath", relative_path, scope="FileRef", collect=("Path", "RelativePathType")),
+        alsStream.rule("BrowserContentPath", lambda old, scope: map_url(old, mapping)),
+    ]
+
+def mentions(set_path, needles):
+    """
+    True if the decompressed set contains any of the `needles` (bytes), read in streaming chunks.
+    Lets a set that references none of the old prefixes be skipped without re-compressing it.
+    """
+    overlap = max(len(needle) for needle in needles) - 1
+    tail = b""
+    with gzip.open(set_path, "rb") as f:
+        while True:
+            data = f.read(alsStream.STREAM_CHUNK_SIZE)
+            if not data:
+                return False
+            window = tail + data
+            if any(needle in window for needle in needles):
+                return True
+            tail = window[-overlap:] if overlap else b""
+
+def relocate_set(job):
+    """
+    Relocate worker for one (set_path, mapping, level, dry_run) job: rewrites the set's file
+    references in a single streaming pass and replaces it atomically; every other byte of the
+    XML stays as it was. Returns {"status": "relocated" / "unchanged" / "unreadable", "edits"}.
+    """
+    set_path, mapping, level, dry_run = job
+    rules = relocation_rules(mapping, os.path.dirname(set_path))
+    try:
+        if not mentions(set_path, [alsRewrite.xml_attr(old) for old, _ in mapping]):
+            return {"status": "unchanged", "edits": 0}
+        if dry_run:
+            with gzip.open(set_path, "rb") as f:
+                counts, _ = alsStream.edit_stream(f.read, None, rules)
+        else:
+            counts = alsStream.edit_als(set_path, set_path, rules, level=level, only_changed=True)
+    except setValidator.READ_ERRORS as e:
+        return {"status": "unreadable", "error": f"{e.__class__.__name__}: {e}"}
+    edits = sum(counts.values())
+    return {"status": "relocated" if edits else "unchanged", "edits": edits}
+
+def relocate_library(root, mapping, bpm=None, key=None, workers=None, executor=None, level=None,
+                     dry_run=False, catalog=True):
+    """
+    Relocates every .als in the track folders of `root` (where the sets are now) from the old to
+    the new prefixes of `mapping`, in a worker pool, then moves their set catalog rows.
+    Returns (status counts, file references rewritten).
+    """
+    counts = Counter()
+    edits = 0
+    level = alsRewrite.GZIP_LEVEL if level is None else level
+
+    def jobs():
+        for _, _, _, entries in stemScanner.scan_track_folders(root, bpm, key, suffix=".als"):
+            for entry in entries:
+                yield entry.path, mapping, level, dry_run
+
+    def report(index, result):
+        nonlocal edits
+        counts[result["status"]] += 1
+        details = result["details"] or {}
+        edits += details.get("edits", 0)
+        if result["status"] == "relocated":
+            print(f"🚚 {result['job'][0]}: {details['edits']} reference(s)" + (" (dry run)" if dry_run else ""))
+        elif result["status"] != "unchanged":
+            error = result["error"] or details.get("error")
+            print(f"❌ {result['job'][0]}: {result['status']}" + (f" ({error})" if error else ""))
+
+    batchGen.run_batch(jobs(), relocate_set, workers=workers, executor=executor, report=report)
+    if catalog and not dry_run:
+        from . import setCatalog
+        import sqlite3
+        try:
+            counts["catalogued"] = setCatalog.relocate(lambda path: map_path(path, mapping))
+        except sqlite3.Error as e:
+            print(f"⚠️ Warning: Could not update the set catalog: {e}")
+    return dict(counts), edits
+
+def main(argv=None, prog=None):
+    """
+    Command-line entry point (also `alsgen relocate`). Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Point existing sets at moved stems, in place.")
+    parser.add_argument("stems", help="STEMS folder the sets are in now")
+    parser.add_argument("--from", dest="old_root", metavar="OLD_STEMS",
+                        help="Where the STEMS folder was (same as --map OLD_STEMS=STEMS)")
+    parser.add_argument("--map", action="append", default=[], metavar="OLD=NEW",
+                        help="Move references under OLD to NEW (repeatable, longest OLD wins)")
+    parser.add_argument("--bpm", type=float, action="append", help="Only relocate this BPM folder (repeatable)")
+    parser.add_argument("--key", action="append", help="Only relocate this key folder, e.g. 8A (repeatable)")
+    parser.add_argument("--workers", type=int, default=batchGen.BATCH_WORKERS, help="Number of parallel workers")
+    parser.add_argument("--executor", choices=["process", "thread", "serial"], default=batchGen.BATCH_EXECUTOR)
+    parser.add_argument("--compression", choices=sorted(alsRewrite.GZIP_PROFILES),
+                        help="Compression profile of the rewritten sets (default: max)")
+    parser.add_argument("--dry-run", action="store_true", help="Count the references to move, write nothing")
+    parser.add_argument("--no-catalog", dest="catalog", action="store_false", help="Leave the set catalog as is")
+    args = parser.parse_args(argv)
+
+    pairs = args.map + ([f"{args.old_root}={args.stems}"] if args.old_root else [])
+    if not pairs:
+        parser.error("nothing to relocate: pass --from OLD_STEMS or --map OLD=NEW")
+    try:
+        mapping = parse_mapping(pairs)
+    except ValueError as e:
+        parser.error(str(e))
+    level = alsRewrite.GZIP_PROFILES[args.compression] if args.compression else None
+
+    start = time.perf_counter()
+    counts, edits = relocate_library(args.stems, mapping, bpm=args.bpm, key=args.key, workers=args.workers,
+                                     executor=args.executor, level=level, dry_run=args.dry_run,
+                                     catalog=args.catalog)
+    print(f"🚚 {'Would relocate' if args.dry_run else 'Relocated'} {edits} reference(s) in "
+          f"{counts.get('relocated', 0)} set(s) in {time.perf_counter() - start:.2f}s: "
+          + ", ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+    return 1 if counts.get("unreadable") or counts.get("failed") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
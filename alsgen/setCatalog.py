@@ -0,0 +1,342 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import Counter
+from . import batchGen
+from . import stemScanner
+
+# ✅ CONFIG: Catalog of generated sets (set to None to disable)
+CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".cache", "alsGen", "catalog.sqlite")
+INDEX_BATCH_SIZE = 500  # Sets written per transaction by the bulk indexer
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sets (
+    id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, folder TEXT, bpm REAL, key TEXT COLLATE NOCASE,
+    track TEXT, template TEXT, loop_end REAL, size INTEGER, mtime_ns INTEGER, source TEXT, recorded_at REAL);
+CREATE INDEX IF NOT EXISTS sets_bpm_key ON sets (bpm, key);
+CREATE TABLE IF NOT EXISTS samples (
+    set_id INTEGER, stem TEXT, path TEXT, name TEXT, in_folder INTEGER, PRIMARY KEY (set_id, stem)) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS samples_path ON samples (path);
+CREATE INDEX IF NOT EXISTS samples_name ON samples (name);
+"""
+
+# Columns of a set in query results (the integer id only keys the samples table)
+SET_COLUMNS = "path, folder, bpm, key, track, template, loop_end, size, mtime_ns, source, recorded_at"
+DELETE_SAMPLES = "DELETE FROM samples WHERE set_id IN (SELECT id FROM sets WHERE path = ?)"
+
+_db = None
+_db_pid = None
+_lock = threading.Lock()  # One connection per process, shared by the pipeline's I/O threads
+
+def _connect():
+    """
+    Opens the catalog once per process (connections must not cross a fork). Call with _lock held.
+    """
+    global _db, _db_pid
+    if CATALOG_PATH is None:
+        return None
+    if _db_pid != os.getpid():
+        _db, _db_pid = None, os.getpid()
+        try:
+            os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+            _db = sqlite3.connect(CATALOG_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+            _db.execute("PRAGMA journal_mode=WAL")
+            _db.execute("PRAGMA synchronous=NORMAL")
+            _db.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Warning: Set catalog disabled ({e})")
+            _db = None
+    return _db
+
+def configure(path):
+    """
+    Switches to another catalog database (None disables recording).
+    """
+    global CATALOG_PATH, _db, _db_pid
+    if path != CATALOG_PATH:
+        CATALOG_PATH, _db, _db_pid = path, None, None
+
+def path_metadata(folder):
+    """
+    (bpm, key, track) of a <bpm>/<key>/<track> folder; bpm is None outside that layout.
+    """
+    parts = os.path.normpath(folder).split(os.sep)
+    if len(parts) < 3:
+        return None, None, parts[-1]
+    return stemScanner.parse_bpm(parts[-3]), parts[-2], parts[-1]
+
+def set_info(set_path, stems, loop_end=None, template=None, source="generate"):
+    """
+    Catalog entry of a set saved in its track folder: the folder's bpm/key/track, the template,
+    the stem clips' LoopEnd in beats and {stem: sample path}.
+    """
+    folder = os.path.dirname(os.path.abspath(set_path))
+    bpm, key, track = path_metadata(folder)
+    return {"path": os.path.abspath(set_path), "folder": folder, "bpm": bpm, "key": key, "track": track,
+            "template": template, "loop_end": loop_end, "stems": stems, "source": source}
+
+def _write(db, infos):
+    """
+    Replaces the catalog rows of `infos` (each with "size" and "mtime_ns") in one transaction.
+    """
+    now = time.time()
+    db.execute("BEGIN")
+    try:
+        for info in infos:
+            db.execute(DELETE_SAMPLES, (info["path"],))
+            set_id = db.execute(
+                f"INSERT OR REPLACE INTO sets ({SET_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (info["path"], info["folder"], info["bpm"], info["key"], info["track"], info["template"],
+                 info["loop_end"], info["size"], info["mtime_ns"], info["source"], now)).lastrowid
+            folder = os.path.normpath(info["folder"])
+            db.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?)", [
+                (set_id, stem, path, path.replace("\\", "/").rsplit("/", 1)[-1],
+                 os.path.normpath(os.path.dirname(path)) == folder)
+                for stem, path in info["stems"].items()])
+        db.execute("COMMIT")
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+
+def record(info):
+    """
+    Adds (or refreshes) one written set, see set_info(). Never fails the caller.
+    """
+    try:
+        stat = os.stat(info["path"])
+        with _lock:
+            db = _connect()
+            if db is not None:
+                _write(db, [dict(info, size=stat.st_size, mtime_ns=stat.st_mtime_ns)])
+    except (OSError, sqlite3.Error) as e:
+        print(f"⚠️ Warning: Could not record '{info['path']}' in the set catalog: {e}")
+
+def read_set_info(job):
+    """
+    Bulk index worker: streams one (set_path, size, mtime_ns) set (see setValidator.read_set)
+    into a catalog entry. Returns {"status": "indexed", "info"} or {"status": "unreadable", "error"}.
+    """
+    from . import setValidator
+    from . import stemClassifier
+    set_path, size, mtime_ns = job
+    try:
+        contents = setValidator.read_set(set_path)
+    except setValidator.READ_ERRORS as e:
+        return {"status": "unreadable", "error": f"{e.__class__.__name__}: {e}"}
+    stems = {}
+    for path, _, _ in contents["samples"]:
+        stem = stemClassifier.classify(path.replace("\\", "/").rsplit("/", 1)[-1])
+        if stem:
+            stems.setdefault(stem, path)
+    loop_end = max((value for value, _ in contents["loop_ends"]), default=None)
+    info = set_info(set_path, stems, loop_end, source="index")
+    return {"status": "indexed", "info": dict(info, size=size, mtime_ns=mtime_ns)}
+
+def index_library(root, bpm=None, key=None, full=False, workers=None, executor=None):
+    """
+    Indexes every .als in the track folders of `root`, streaming the sets in a worker pool.
+    Sets whose size and mtime match their catalog row are skipped unless `full`; rows of sets
+    that are gone are removed (on unfiltered runs). Returns the status counts.
+    """
+    with _lock:
+        db = _connect()
+    if db is None:
+        raise RuntimeError("The set catalog is disabled (CATALOG_PATH is None or cannot be opened).")
+    root = os.path.abspath(root)
+    # Every path under root/ sorts between "root/" and "root0" ("0" follows "/")
+    bounds = (root + os.sep, root + chr(ord(os.sep) + 1))
+    known = {path: (size, mtime_ns) for path, size, mtime_ns in
+             db.execute("SELECT path, size, mtime_ns FROM sets WHERE path >= ? AND path < ?", bounds)}
+    seen = set()
+    counts = Counter()
+    pending = []
+
+    def jobs():
+        for _, _, _, entries in stemScanner.scan_track_folders(root, bpm, key, suffix=".als"):
+            for entry in entries:
+                stat = entry.stat()
+                seen.add(entry.path)
+                if not full and known.get(entry.path) == (stat.st_size, stat.st_mtime_ns):
+                    counts["unchanged"] += 1
+                    continue
+                yield entry.path, stat.st_size, stat.st_mtime_ns
+
+    def flush():
+        if pending:
+            with _lock:
+                _write(db, pending)
+            pending.clear()
+
+    def report(index, result):
+        counts[result["status"]] += 1
+        if result["status"] == "indexed":
+            pending.append(result["details"]["info"])
+            if len(pending) >= INDEX_BATCH_SIZE:
+                flush()
+        else:
+            error = result["error"] or (result["details"] or {}).get("error")
+            print(f"❌ {result['job'][0]}: {result['status']}" + (f" ({error})" if error else ""))
+
+    batchGen.run_batch(jobs(), read_set_info, workers=workers, executor=executor, report=report)
+    flush()
+    if not bpm and not key:
+        gone = [(path,) for path in known if path not in seen]
+        with _lock:
+            db.execute("BEGIN")
+            db.executemany(DELETE_SAMPLES, gone)
+            db.executemany("DELETE FROM sets WHERE path = ?", gone)
+            db.execute("COMMIT")
+        counts["removed"] = len(gone)
+    return dict(counts)
+
+def relocate(map_path):
+    """
+    Moves catalog rows along with relocated sets and stems: `map_path(path)` returns the new
+    location of a set or sample path, or None if it did not move. Sets missing at their new
+    location are left for the next index run. Returns the number of sets updated.
+    """
+    with _lock:
+        db = _connect()
+        if db is None:
+            return 0
+        samples = {}
+        for set_id, stem, path in db.execute("SELECT set_id, stem, path FROM samples"):
+            samples.setdefault(set_id, {})[stem] = path
+        infos, moved = [], []
+        for row in db.execute(f"SELECT id, {SET_COLUMNS} FROM sets").fetchall():
+            row = dict(zip(["id"] + SET_COLUMNS.split(", "), row))
+            path = map_path(row["path"]) or row["path"]
+            stems = {stem: map_path(sample) or sample for stem, sample in samples.get(row["id"], {}).items()}
+            if path == row["path"] and stems == samples.get(row["id"], {}):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            info = set_info(path, stems, row["loop_end"], row["template"], row["source"])
+            infos.append(dict(info, size=stat.st_size, mtime_ns=stat.st_mtime_ns))
+            if path != row["path"]:
+                moved.append((row["path"],))
+        db.execute("BEGIN")
+        db.executemany(DELETE_SAMPLES, moved)
+        db.executemany("DELETE FROM sets WHERE path = ?", moved)
+        db.execute("COMMIT")
+        _write(db, infos)
+    return len(infos)
+
+def _query(sql, params=()):
+    with _lock:
+        db = _connect()
+        if db is None:
+            return []
+        cursor = db.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+def _filters(bpm=None, key=None, track=None):
+    clauses, params = [], []
+    if bpm is not None:
+        clauses.append("sets.bpm = ?")
+        params.append(float(bpm))
+    if key is not None:
+        clauses.append("sets.key = ?")
+        params.append(key)
+    if track is not None:
+        clauses.append("sets.track LIKE ?")
+        params.append(f"%{track}%")
+    return "".join(f" AND {clause}" for clause in clauses), params
+
+def find_sets(bpm=None, key=None, track=None):
+    """
+    Catalogued sets by folder metadata (`track` matches part of the track name), with their LoopEnd.
+    """
+    where, params = _filters(bpm, key, track)
+    return _query(f"SELECT {SET_COLUMNS} FROM sets WHERE 1 = 1{where} ORDER BY bpm, key, track, path", params)
+
+def sets_using(sample):
+    """
+    Sets that play `sample`: a full path, or a file name in any folder.
+    """
+    columns = ", ".join(f"sets.{column} AS {column}" for column in SET_COLUMNS.split(", "))
+    return _query(f"SELECT {columns}, samples.stem FROM samples JOIN sets ON sets.id = samples.set_id "
+                  f"WHERE samples.path = ? UNION "
+                  f"SELECT {columns}, samples.stem FROM samples JOIN sets ON sets.id = samples.set_id "
+                  f"WHERE samples.name = ? ORDER BY bpm, key, track, path", (sample, sample))
+
+def missing_stem(stem, bpm=None, key=None, track=None):
+    """
+    Sets that play no `stem` sample from their own track folder (the folder has no such stem,
+    or the set still plays the template's).
+    """
+    where, params = _filters(bpm, key, track)
+    return _query(f"SELECT {SET_COLUMNS} FROM sets WHERE NOT EXISTS (SELECT 1 FROM samples "
+                  f"WHERE samples.set_id = sets.id AND samples.stem = ? AND samples.in_folder){where} ORDER BY bpm, key, track, path",
+                  [stem] + params)
+
+def _print_sets(rows, as_json):
+    for row in rows:
+        if as_json:
+            print(json.dumps(row))
+            continue
+        bpm = f"{row['bpm']:g}" if row["bpm"] is not None else "?"
+        loop_end = f" (LoopEnd {row['loop_end']:g})" if row["loop_end"] is not None else ""
+        stem = f" [{row['stem']}]" if row.get("stem") else ""
+        print(f"🎯 {bpm} {row['key']} {row['track']}: {row['path']}{stem}{loop_end}")
+
+def main(argv=None, prog=None):
+    """
+    Command-line entry point (also `alsgen catalog`). Returns the exit status.
+    """
+    parser = argparse.ArgumentParser(prog=prog, description="Index generated sets and query the set catalog.")
+    parser.add_argument("--catalog", default=CATALOG_PATH, help=f"Catalog database (default {CATALOG_PATH})")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("index", help="Index the existing sets of a STEMS folder")
+    index.add_argument("stems", help="STEMS folder with <bpm>/<key>/<track> folders")
+    index.add_argument("--full", action="store_true", help="Re-read every set, even if unchanged")
+    index.add_argument("--bpm", type=float, action="append", help="Only index this BPM folder (repeatable)")
+    index.add_argument("--key", action="append", help="Only index this key folder, e.g. 8A (repeatable)")
+    index.add_argument("--workers", type=int, default=batchGen.BATCH_WORKERS, help="Number of parallel workers")
+    index.add_argument("--executor", choices=["process", "thread", "serial"], default=batchGen.BATCH_EXECUTOR)
+    queries = {
+        "sets": commands.add_parser("sets", help="Sets by BPM, key and track name, with their LoopEnd"),
+        "uses": commands.add_parser("uses", help="Sets that play a sample (full path or file name)"),
+        "missing": commands.add_parser("missing", help="Sets without a stem of their own track folder"),
+    }
+    queries["uses"].add_argument("sample")
+    queries["missing"].add_argument("stem", help="Template slot, e.g. vocals")
+    for name, query in queries.items():
+        if name != "uses":
+            query.add_argument("--bpm", type=float)
+            query.add_argument("--key")
+            query.add_argument("--track", help="Part of the track name")
+        query.add_argument("--json", action="store_true", help="Print one JSON object per set")
+    args = parser.parse_args(argv)
+    configure(args.catalog)
+
+    if args.command == "index":
+        start = time.perf_counter()
+        counts = index_library(args.stems, bpm=args.bpm, key=args.key, full=args.full, workers=args.workers,
+                               executor=args.executor)
+        print(f"📚 Catalog {CATALOG_PATH} updated in {time.perf_counter() - start:.2f}s: "
+              + ", ".join(f"{status}={n}" for status, n in sorted(counts.items())))
+        return 1 if counts.get("unreadable") or counts.get("failed") else 0
+
+    start = time.perf_counter()
+    if args.command == "uses":
+        rows = sets_using(args.sample)
+    elif args.command == "missing":
+        rows = missing_stem(args.stem, args.bpm, args.key, args.track)
+    else:
+        rows = find_sets(args.bpm, args.key, args.track)
+    elapsed = time.perf_counter() - start
+    _print_sets(rows, args.json)
+    if not args.json:
+        print(f"🔎 {len(rows)} set(s) in {elapsed * 1000:.1f} ms")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,164 @@
+import gzip
+import json
+import os
+import time
+import xml.parsers.expat
+import zlib
+from collections import Counter, OrderedDict
+from . import alsStream
+from . import stemClassifier
+
+# ✅ CONFIG: Post-generation validation
+LOOP_END_TOLERANCE = 0.001  # Beats a stem clip's LoopEnd may differ from the expected clip length
+LISTING_CACHE_SIZE = 1024  # Directory listings kept per process (one listing serves every sample in a folder)
+RELATIVE_PATH_TYPES = ("1", "3")  # RelativePathType values resolved against the set's folder (external, project)
+
+# Errors that mean a set file is truncated, not gzip or not well-formed XML
+READ_ERRORS = (OSError, EOFError, zlib.error, xml.parsers.expat.ExpatError)
+
+def _keep(old, scope):
+    return old
+
+# Sample references: the FileRef directly under each SampleRef (not the OriginalFileRef copies)
+SAMPLE_RULE = alsStream.rule("SampleRef/FileRef/Path", _keep, scope="FileRef",
+                             collect=("Path", "RelativePath", "RelativePathType"))
+LOOP_END_RULE = alsStream.rule("AudioTrack/**/AudioClip/Loop/LoopEnd", _keep, scope="AudioClip")
+TEMPO_RULE = alsStream.rule("LiveSet/*/DeviceChain/Mixer/Tempo/Manual", _keep)
+
+_listings = OrderedDict()
+
+def _listing(directory):
+    """
+    Names in `directory` (None if it cannot be listed), from the per-process LRU cache.
+    """
+    names = _listings.get(directory, False)
+    if names is not False:
+        _listings.move_to_end(directory)
+        return names
+    try:
+        names = frozenset(os.listdir(directory))
+    except OSError:
+        names = None
+    _listings[directory] = names
+    if len(_listings) > LISTING_CACHE_SIZE:
+        _listings.popitem(last=False)
+    return names
+
+def clear_listings():
+    """
+    Forgets cached directory listings (e.g. after regenerating or moving stems).
+    """
+    _listings.clear()
+
+def exists(path):
+    """
+    True if `path` is listed in its directory (one listing per directory, no stat per file).
+    """
+    directory, name = os.path.split(os.path.normpath(path))
+    names = _listing(directory)
+    return names is not None and name in names
+
+def resolve_sample(set_folder, path, relative_path, relative_type):
+    """
+    Resolves a sample reference the way Live does: the absolute Path first, then the
+    RelativePath from the set's folder. Returns (resolved_path or None, how) with how in
+    "path", "relative" or "missing".
+    """
+    if path and exists(path):
+        return path, "path"
+    if relative_path and relative_type in RELATIVE_PATH_TYPES:
+        candidate = os.path.normpath(os.path.join(set_folder, relative_path))
+        if exists(candidate):
+            return candidate, "relative"
+    return None, "missing"
+
+def read_set(set_path):
+    """
+    Streams a set once and returns its sample references, stem clip loop ends and master tempo:
+    {"samples": [(path, relative_path, relative_type)], "loop_ends": [(loop_end, sample_name)], "tempo": float}.
+    """
+    with gzip.open(set_path, "rb") as f:
+        _, matches = alsStream.edit_stream(f.read, None, [SAMPLE_RULE, LOOP_END_RULE, TEMPO_RULE])
+    samples, loop_ends, tempo = [], [], None
+    for _, _, r, value, scope in matches:
+        if r is SAMPLE_RULE:
+            values = scope["values"]
+            samples.append((values.get("Path", [""])[0], values.get("RelativePath", [""])[0],
+                            values.get("RelativePathType", [""])[0]))
+        elif r is LOOP_END_RULE:
+            name = next((v.replace("\\", "/").rsplit("/", 1)[-1] for v in scope["values"].get("Path", [])), None)
+            if name and stemClassifier.classify(name):
+                loop_ends.append((float(value), name))
+        elif r is TEMPO_RULE:
+            tempo = float(value)
+    return {"samples": samples, "loop_ends": loop_ends, "tempo": tempo}
+
+def validate_set(set_path, loop_end_for=None, bpm=None):
+    """
+    Checks one generated set: the gzip/XML stream is complete, every sample reference resolves,
+    and (with `loop_end_for(track_names, bpm)` returning the expected LoopEnd in beats, e.g.
+    alsGen.get_loop_end) every stem clip's LoopEnd matches the stems it plays.
+    `bpm` is the tempo the stems are warped to (default: the set's master tempo; per-BPM
+    templates keep their master tempo, so pass the folder's BPM).
+    Returns {"set", "status" ("valid" or "broken"), "samples", "problems": [...]}.
+    """
+    result = {"set": set_path, "status": "valid", "samples": 0, "problems": []}
+    problems = result["problems"]
+    try:
+        info = read_set(set_path)
+    except READ_ERRORS as e:
+        problems.append({"type": "unreadable", "error": f"{e.__class__.__name__}: {e}"})
+        result["status"] = "broken"
+        return result
+
+    set_folder = os.path.dirname(os.path.abspath(set_path))
+    track_names = {}
+    result["samples"] = len(info["samples"])
+    for path, relative_path, relative_type in info["samples"]:
+        resolved, how = resolve_sample(set_folder, path, relative_path, relative_type)
+        if resolved is None:
+            problems.append({"type": "missing-sample", "path": path, "relative_path": relative_path})
+            continue
+        if how == "relative":
+            # Live finds it, but reports the set as changed until it is saved again
+            problems.append({"type": "relative-only", "path": path, "resolved": resolved})
+        slot = stemClassifier.classify(os.path.basename(resolved))
+        if slot:
+            track_names.setdefault(slot, resolved)
+    if not info["samples"]:
+        problems.append({"type": "no-samples"})
+
+    if loop_end_for and info["loop_ends"] and track_names and not any(
+            p["type"] == "missing-sample" for p in problems):
+        expected = loop_end_for(track_names, bpm or info["tempo"])
+        if expected is not None:
+            for loop_end, name in info["loop_ends"]:
+                if abs(loop_end - float(expected)) > LOOP_END_TOLERANCE:
+                    problems.append({"type": "loop-end-mismatch", "clip": name, "loop_end": loop_end,
+                                     "expected": float(expected)})
+
+    if any(p["type"] != "relative-only" for p in problems):
+        result["status"] = "broken"
+    return result
+
+def write_report(path, results, extra=None):
+    """
+    Writes the JSON validation report: status counts and every set with a problem.
+    `results` are batchGen result dicts whose "details" hold the folder's {"sets": [...]}.
+    """
+    sets = [s for result in results for s in (result.get("details") or {}).get("sets", [])]
+    report = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "folders": len(results),
+        "sets": len(sets),
+        "status": dict(Counter(result["status"] for result in results)),
+        "problems": dict(Counter(p["type"] for s in sets for p in s["problems"])),
+        "broken": [s for s in sets if s["status"] != "valid"],
+        "warnings": [s for s in sets if s["status"] == "valid" and s["problems"]],
+        "failed": [{"folder": result["job"][0], "error": result["error"]}
+                   for result in results if result["status"] == "failed"],
+        **(extra or {}),
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(report, indent=2) + "\n")
+    return report
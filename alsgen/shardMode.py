@@ -0,0 +1,270 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import socket
+import threading
+import time
+from collections import Counter
+from . import alsRewrite
+from . import instrumentation
+
+# ✅ CONFIG: Multi-node shards over a shared STEMS volume
+SHARD_DIR_NAME = ".alsGen-shards"  # Per-shard run reports, stored at the root of the STEMS folder
+LOCK_DIR_NAME = ".alsGen-locks"  # One lock file per folder being generated
+LOCK_STALE_SECONDS = 30 * 60  # A lock untouched for this long belongs to a dead node and may be taken over
+
+def parse_shard(text):
+    """
+    Parses "i/N" (1 <= i <= N) into (i, N).
+    """
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{text}' (expected i/N, e.g. 2/4).")
+    if not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{text}' (i must be between 1 and N).")
+    return index, count
+
+def folder_key(root, folder):
+    """
+    Stable identity of a track folder on every node: its path relative to the STEMS root, "/"-separated.
+    """
+    return os.path.relpath(folder, root).replace(os.sep, "/")
+
+def shard_of(key, count):
+    """
+    1-based shard owning `key`. Uses BLAKE2b rather than hash(), which is salted per process.
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count + 1
+
+def _owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def _break_stale_lock(path, owner):
+    """
+    Removes `path` if it has not been touched for LOCK_STALE_SECONDS. Returns True if it is gone.
+    The lock is renamed away before deleting, so of several nodes breaking it at once only one wins,
+    and a lock re-created by another node in the meantime is put back untouched.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return True
+    if time.time() - stat.st_mtime < LOCK_STALE_SECONDS:
+        return False
+    moved = f"{path}.stale-{owner.replace(':', '-')}"
+    try:
+        os.rename(path, moved)
+    except FileNotFoundError:
+        return True  # another node broke it first
+    taken = os.stat(moved)
+    if (taken.st_ino, taken.st_mtime_ns) != (stat.st_ino, stat.st_mtime_ns):
+        # Not the lock we judged stale: a fresh one from another node
+        try:
+            os.link(moved, path)
+        except OSError:
+            pass
+        os.unlink(moved)
+        return False
+    os.unlink(moved)
+    return True
+
+def acquire_lock(lock_dir, key, owner=None):
+    """
+    Creates the lock file of folder `key` (O_EXCL, so exactly one node gets it, NFSv3+ included).
+    Returns the lock path, or None if another live node holds it.
+    """
+    owner = owner or _owner()
+    path = os.path.join(lock_dir, hashlib.blake2b(key.encode("utf-8"), digest_size=16).hexdigest() + ".lock")
+    for _ in range(2):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            if not _break_stale_lock(path, owner):
+                return None
+            continue
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"folder": key, "owner": owner, "acquired_at": time.time()}, f)
+        return path
+    return None
+
+def release_lock(path):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+class ShardRun:
+    """
+    One node's share of a multi-node run: keeps the folders whose key hashes to shard i of N,
+    holds a lock file for each folder while it is generated, and writes a per-run JSON report
+    under SHARD_DIR_NAME that merge_reports() combines across nodes.
+    `outputs_for_job(job)` lists the set files a job writes; a folder whose sets were written
+    by another node since this run started is skipped, even after that node released its lock.
+    locked() may run in another thread than finish() (the pipeline scans in its I/O pool), so the
+    held locks and skip counts are guarded by a lock.
+    """
+
+    def __init__(self, root, index, count, outputs_for_job=None):
+        self.root = root
+        self.index, self.count = index, count
+        self.owner = _owner()
+        self.outputs_for_job = outputs_for_job
+        self.lock_dir = os.path.join(root, LOCK_DIR_NAME)
+        self.report_dir = os.path.join(root, SHARD_DIR_NAME)
+        os.makedirs(self.lock_dir, exist_ok=True)
+        os.makedirs(self.report_dir, exist_ok=True)
+        self.report_path = os.path.join(
+            self.report_dir, f"shard-{index}-of-{count}.{self.owner.replace(':', '-')}.json")
+        self.locks = {}  # folder -> lock path
+        self._lock = threading.Lock()
+        self.results = []
+        self.skipped = Counter()
+        self.started_at = time.time()
+        self.write_report("running")
+        # Reference time on the shared filesystem's clock, not this node's
+        self.started_ns = os.stat(self.report_path).st_mtime_ns
+
+    def _written_since_start(self, job):
+        if not self.outputs_for_job:
+            return False
+        outputs = [os.path.join(job[0], name) for name in self.outputs_for_job(job)]
+        try:
+            return bool(outputs) and all(os.stat(path).st_mtime_ns >= self.started_ns for path in outputs)
+        except OSError:
+            return False
+
+    def owned(self, jobs):
+        """
+        Yields the jobs whose folder belongs to this shard.
+        """
+        for job in jobs:
+            if shard_of(folder_key(self.root, job[0]), self.count) == self.index:
+                yield job
+
+    def locked(self, jobs):
+        """
+        Yields the jobs no other node is generating, holding a lock on each until finish().
+        """
+        for job in jobs:
+            folder = job[0]
+            lock = acquire_lock(self.lock_dir, folder_key(self.root, folder), self.owner)
+            if lock is None:
+                print(f"🔒 {folder}: locked by another node")
+                with self._lock:
+                    self.skipped["locked"] += 1
+                continue
+            if self._written_since_start(job):
+                release_lock(lock)
+                print(f"⏭️ {folder}: generated by another node")
+                with self._lock:
+                    self.skipped["done-elsewhere"] += 1
+                continue
+            with self._lock:
+                self.locks[folder] = lock
+            yield job
+
+    def finish(self, job, status, seconds=0.0, error=None):
+        """
+        Records a finished job and releases its lock; also refreshes the other held locks
+        so long runs never look stale.
+        """
+        with self._lock:
+            lock = self.locks.pop(job[0], None)
+            held = list(self.locks.values())
+        if lock:
+            release_lock(lock)
+        for path in held:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+        self.results.append({"folder": folder_key(self.root, job[0]), "status": status,
+                             "seconds": round(seconds, 3), "error": error, "finished_at": time.time()})
+
+    def close(self):
+        with self._lock:
+            held = list(self.locks.values())
+            self.locks.clear()
+        for lock in held:
+            release_lock(lock)
+
+    def _skipped(self):
+        with self._lock:
+            return dict(self.skipped)
+
+    def write_report(self, state, extra=None):
+        report = {
+            "shard": [self.index, self.count],
+            "owner": self.owner,
+            "state": state,
+            "started_at": self.started_at,
+            "finished_at": time.time() if state != "running" else None,
+            "skipped": self._skipped(),
+            "results": self.results,
+            "metrics": instrumentation.report(extra),
+        }
+        alsRewrite.write_atomic(self.report_path, (json.dumps(report, indent=2) + "\n").encode("utf-8"))
+
+def merge_reports(root):
+    """
+    Combines every shard report under `root` into one: the latest result per folder,
+    status counts, summed stage timings and counters, and the shards seen.
+    """
+    folders, shards = {}, []
+    stages, counters, skipped = {}, Counter(), Counter()
+    for path in sorted(glob.glob(os.path.join(root, SHARD_DIR_NAME, "shard-*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Warning: Skipping shard report '{path}': {e}")
+            continue
+        shards.append({"shard": report["shard"], "owner": report["owner"], "state": report["state"],
+                       "started_at": report["started_at"], "finished_at": report["finished_at"],
+                       "results": len(report["results"])})
+        for result in report["results"]:
+            previous = folders.get(result["folder"])
+            if previous is None or result["finished_at"] >= previous["finished_at"]:
+                folders[result["folder"]] = result
+        for stage, value in report["metrics"]["stages"].items():
+            total = stages.setdefault(stage, {"calls": 0, "seconds": 0.0})
+            total["calls"] += value["calls"]
+            total["seconds"] = round(total["seconds"] + value["seconds"], 6)
+        counters.update(report["metrics"]["counters"])
+        skipped.update(report["skipped"])
+    finished = {tuple(s["shard"]) for s in shards if s["state"] == "finished"}
+    shard_counts = sorted({s["shard"][1] for s in shards})
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "shards": shards,
+        "shard_counts": shard_counts,
+        # Every shard i/N has at least one finished run (reports of crashed runs stay "running")
+        "complete": bool(shards) and all((i, n) in finished for n in shard_counts for i in range(1, n + 1)),
+        "status": dict(Counter(result["status"] for result in folders.values())),
+        "skipped": dict(skipped),
+        "stages": dict(sorted(stages.items())),
+        "counters": dict(sorted(counters.items())),
+        "failed": sorted(folder for folder, result in folders.items() if result["status"] == "failed"),
+        "folders": dict(sorted(folders.items())),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Merge the per-shard reports of a multi-node run.")
+    parser.add_argument("root", help="STEMS folder the shards ran on")
+    parser.add_argument("-o", "--output", help="Write the merged report here (default: print a summary)")
+    args = parser.parse_args()
+    merged = merge_reports(args.root)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(json.dumps(merged, indent=2) + "\n")
+        print(f"📄 Merged report saved to {args.output}")
+    print(f"📊 {len(merged['shards'])} shard report(s), {len(merged['folders'])} folders: "
+          + ", ".join(f"{status}={n}" for status, n in sorted(merged["status"].items())))
+    if not merged["complete"]:
+        print("⚠️ Not every shard has finished.")
+    for folder in merged["failed"]:
+        print(f"❌ {folder}")
@@ -0,0 +1,131 @@
+import re
+from functools import lru_cache
+
+# ✅ CONFIG: Stem classification
+# Each rule maps file names to a stem:
+# "patterns" are regular expressions matched case-insensitively as whole words ("inst" does not match "Instant"),
+# "priority" decides between rules when a name matches several of them (lower wins),
+# "slot" is the template track the stem fills (a template FLAC classified as the same stem).
+# The stem label of a name decides over words of the title, whatever the priorities. Labels are
+# read, in this order, from a trailing bracket ("Title (Vocals)"), around " - " ("Title - vocals",
+# then "drums - Title") and around "-" ("drums-Title", then "Title-vocals"), or the whole name
+# ("vocals"). Without a label, a stem word at the end of the name beats one at the start.
+STEM_RULES = [
+    {"stem": "vocals", "patterns": [r"vocals?", r"vox", r"acapella", r"a cappella"], "priority": 10, "slot": "vocals"},
+    {"stem": "Inst", "patterns": [r"inst", r"instrumental"], "priority": 20, "slot": "Inst"},
+    {"stem": "drums", "patterns": [r"drums?", r"percussion"], "priority": 30, "slot": "drums"},
+    {"stem": "bass", "patterns": [r"bass"], "priority": 40, "slot": "bass"},
+    {"stem": "piano", "patterns": [r"piano", r"keys"], "priority": 50, "slot": "piano"},
+    {"stem": "other", "patterns": [r"other"], "priority": 60, "slot": "other"},
+]
+
+LABEL_TRIM = " _-.()[]{}0123456789"  # Track numbers and brackets around a leading/trailing stem label
+COMPLEMENT_SLOT = "Inst"  # Slot of "no_vocals" / "without drums" files (everything but that stem)
+NEGATION = r"(?:no|without)[ _]+"
+
+BRACKET_LABEL = re.compile(r"[(\[{]([^()\[\]{}]*)[)\]}]\W*$")
+
+def compile_rules(rules):
+    """
+    Compiles a rule table into one alternation regex with a named group per rule.
+    Returns {"pattern" (stem words in a name), "label" (a whole stem label), "rules" (by group name),
+    "slots" (in table order)}.
+    """
+    groups = []
+    by_group = {}
+    for i, r in enumerate(rules):
+        group = f"r{i}"
+        by_group[group] = r
+        groups.append(f"(?P<{group}>" + "|".join(r["patterns"]) + ")")
+    stem = f"(?P<negated>{NEGATION})?(?:" + "|".join(groups) + ")"
+    return {
+        "pattern": re.compile(r"(?<![a-z])" + stem + r"(?![a-z])", re.IGNORECASE),
+        "label": re.compile(stem, re.IGNORECASE),
+        "rules": by_group,
+        "slots": list(dict.fromkeys(r.get("slot") or r["stem"] for r in rules)),
+    }
+
+_matcher = compile_rules(STEM_RULES)
+
+def set_rules(rules):
+    """
+    Replaces the rule table (e.g. for a separator with other stem names).
+    """
+    global _matcher
+    _matcher = compile_rules(rules)
+    _rank.cache_clear()
+
+def slots():
+    """
+    Template track slots in rule table order.
+    """
+    return list(_matcher["slots"])
+
+def _labels(base):
+    """
+    Candidate stem labels of a file name (without extension), most telling first (see STEM_RULES).
+    """
+    labels = []
+    bracket = BRACKET_LABEL.search(base)
+    if bracket:
+        labels.append(bracket.group(1))
+    if " - " in base:
+        labels += [base.rsplit(" - ", 1)[1], base.split(" - ", 1)[0]]
+    if "-" in base:
+        labels += [base.split("-", 1)[0], base.rsplit("-", 1)[1]]
+    labels.append(base)
+    return [label.strip(LABEL_TRIM) for label in labels]
+
+def _slot(match):
+    r = _matcher["rules"][match.lastgroup]
+    return COMPLEMENT_SLOT if match.group("negated") else r.get("slot") or r["stem"]
+
+@lru_cache(maxsize=4096)
+def _rank(file_name):
+    """
+    Returns (rank, slot) of the best rule matching `file_name`, or None.
+    A stem label ranks above any stem word of the title, and a plain label above a negated one.
+    """
+    base = file_name.rsplit("/", 1)[-1]
+    if base.lower().endswith(".flac"):
+        base = base[:-len(".flac")]
+    for order, label in enumerate(_labels(base)):
+        match = _matcher["label"].fullmatch(label)
+        if match:
+            r = _matcher["rules"][match.lastgroup]
+            return (0, bool(match.group("negated")), order, r["priority"]), _slot(match)
+    base = base.strip(LABEL_TRIM)
+    best = None
+    for match in _matcher["pattern"].finditer(base):
+        r = _matcher["rules"][match.lastgroup]
+        position = 0 if match.end() == len(base) else 1 if match.start() == 0 else 2
+        rank = (1, bool(match.group("negated")), position, r["priority"], match.start())
+        if best is None or rank < best[0]:
+            best = (rank, _slot(match))
+    return best
+
+def classify(file_name):
+    """
+    Maps a FLAC file name to the template slot of its stem ("drums", "Inst", "vocals", "bass", ...), or None.
+    """
+    best = _rank(file_name)
+    return best[1] if best else None
+
+def classify_folder(entries, relpath=None):
+    """
+    Maps the FLAC DirEntry objects of one folder listing to template slots in a single pass.
+    Every slot of the rule table is present (None when the folder has no such stem); when several
+    files land on one slot, the best-ranked wins, then the first in listing order.
+    `relpath(entry)` turns an entry into the stored path (default: its file name).
+    """
+    track_names = dict.fromkeys(_matcher["slots"])
+    ranks = {}
+    for entry in entries:
+        best = _rank(entry.name)
+        if best is None:
+            continue
+        rank, slot = best
+        if slot not in ranks or rank < ranks[slot]:
+            ranks[slot] = rank
+            track_names[slot] = relpath(entry) if relpath else entry.name
+    return track_names
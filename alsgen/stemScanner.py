@@ -0,0 +1,73 @@
+import os
+from collections import OrderedDict
+
+# DirEntry objects of recently scanned FLAC files, so stat() calls made right after
+# a folder is yielded (e.g. by the build manifest) reuse their cached data
+STAT_CACHE_SIZE = 4096
+_entries = OrderedDict()
+
+def _subdirs(path):
+    """
+    Sorted, non-hidden subdirectories of `path` as DirEntry objects.
+    """
+    try:
+        with os.scandir(path) as it:
+            entries = [e for e in it if not e.name.startswith(".") and e.is_dir(follow_symlinks=True)]
+    except OSError as e:
+        print(f"   Warning: Could not scan '{path}': {e}")
+        return []
+    return sorted(entries, key=lambda e: e.name)
+
+def parse_bpm(name):
+    """
+    Returns the BPM encoded in a folder name ("120" -> 120, "128.5" -> 128.5), or None for non-BPM folders.
+    """
+    if name.isdigit():
+        return int(name)
+    whole, dot, fraction = name.partition(".")
+    if dot and whole.isdigit() and fraction.isdigit():
+        return float(name)
+    return None
+
+def scan_track_folders(directory, bpm=None, key=None, suffix=".flac"):
+    """
+    Streams the <directory>/<bpm>/<key>/<track> layout, yielding
+    (folder_path, bpm_value, key_value, flac_entries) as soon as each track folder is listed.
+    Non-numeric BPM folders are skipped and nothing below track depth is visited.
+    `bpm` / `key` optionally restrict the walk to a collection of BPM values / key names.
+    `suffix` selects other files than the stems, e.g. ".als" for the generated sets.
+    """
+    bpm_filter = {float(b) for b in bpm} if bpm else None
+    key_filter = {k.lower() for k in key} if key else None
+    for bpm_entry in _subdirs(directory):
+        bpm_value = parse_bpm(bpm_entry.name)
+        if bpm_value is None or (bpm_filter and bpm_value not in bpm_filter):
+            continue
+        for key_entry in _subdirs(bpm_entry.path):
+            if key_filter and key_entry.name.lower() not in key_filter:
+                continue
+            for track_entry in _subdirs(key_entry.path):
+                try:
+                    with os.scandir(track_entry.path) as it:
+                        flac_entries = sorted(
+                            (e for e in it if e.name.lower().endswith(suffix) and e.is_file()),
+                            key=lambda e: e.name,
+                        )
+                except OSError as e:
+                    print(f"   Warning: Could not scan '{track_entry.path}': {e}")
+                    continue
+                if flac_entries:
+                    for entry in flac_entries:
+                        _entries[entry.path] = entry
+                    while len(_entries) > STAT_CACHE_SIZE:
+                        _entries.popitem(last=False)
+                    yield track_entry.path, bpm_value, key_entry.name, flac_entries
+
+def stat(path):
+    """
+    os.stat() that reuses (and releases) the DirEntry cached by the scanner for `path`.
+    """
+    entry = _entries.pop(path, None)
+    if entry is not None:
+        return entry.stat()
+    return os.stat(path)
@@ -0,0 +1,438 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from collections import OrderedDict
+from urllib.parse import unquote
+from . import alsRewrite
+from . import alsStream
+from . import stemClassifier
+
+# 🛠 CONFIG: Template cache
+TEMPLATE_CACHE_MAX_BYTES = 64 * 1024 * 1024  # ~40 decompressed templates per process (1 with a base template)
+SLOT_INDEX_SUFFIX = ".slots.json"  # Sidecar written next to each template, e.g. alsFiles/120.als.slots.json
+SLOT_INDEX_VERSION = 9  # Bump when slot discovery changes so old sidecars are recompiled
+
+# Attributes holding a sample path, and the slot kind each one becomes
+PATH_TAGS = {"Path": "path", "RelativePath": "relative_path", "BrowserContentPath": "url"}
+
+WARP_PATTERN = re.compile(rb'<WarpMarker Id="\d+" SecTime="([^"]*)" BeatTime="([^"]*)"')
+TRACK_START = re.compile(rb'(?<=\n)[\t ]*<AudioTrack ')
+TRACK_END = b"</AudioTrack>\n"
+PATH_PATTERN = re.compile(rb'<(' + b"|".join(t.encode() for t in PATH_TAGS) + rb') Value="([^"]*\.flac)"')
+
+# Loop markers are only slots on clips that play a stem; other LoopEnd/OutMarker elements
+# (devices, locators, unrelated clips) keep their template values
+MARKER_RULES = [
+    alsStream.rule(f"AudioTrack/**/AudioClip/Loop/{tag}", lambda old, scope: old, scope="AudioClip",
+                   when=alsStream.in_stem_clip(stemClassifier.classify))
+    for tag in alsRewrite.MARKER_TAGS
+]
+
+def _keep(old, scope):
+    return old
+
+# File-level values Live keeps per sample (in the SampleRef and its FileRef copies), and the slot kind
+# each becomes. Stale values make Live treat the sample as changed and re-analyze it on load.
+# OriginalCrc is not among them: Live's checksum algorithm is undocumented, so it keeps the template value.
+SAMPLE_TAGS = {"OriginalFileSize": "file_size", "LastModDate": "mod_date",
+               "DefaultDuration": "frames", "DefaultSampleRate": "sample_rate"}
+SAMPLE_RULES = {
+    kind: alsStream.rule(f"AudioTrack/**/SampleRef/**/{tag}", _keep, scope="SampleRef",
+                         when=alsStream.in_stem_clip(stemClassifier.classify))
+    for tag, kind in SAMPLE_TAGS.items()
+}
+
+# Tempo-dependent values, rescaled when a set is rendered at another BPM than its template's.
+# "tempo" slots take the new BPM, "beats" slots scale with it and "seconds" slots (warp marker
+# SecTime, see WARP_PATTERN) scale inversely. The tempo automation event is told apart from
+# other envelopes by the Tempo parameter's AutomationTarget Id.
+TEMPO_TARGET_PATH = "LiveSet/*/DeviceChain/Mixer/Tempo/AutomationTarget"
+TEMPO_RULES = {
+    "LiveSet/*/DeviceChain/Mixer/Tempo/Manual": alsStream.rule("LiveSet/*/DeviceChain/Mixer/Tempo/Manual", _keep),
+    TEMPO_TARGET_PATH: alsStream.rule(TEMPO_TARGET_PATH, _keep, attr="Id"),
+    "tempo_event": alsStream.rule("LiveSet/*/AutomationEnvelopes/Envelopes/AutomationEnvelope/Automation/Events/FloatEvent",
+                                  _keep, scope="AutomationEnvelope", collect=("PointeeId",)),
+    "current_end": alsStream.rule("AudioClip/CurrentEnd", _keep),
+    "left_time": alsStream.rule("AudioClip/ScrollerTimePreserver/LeftTime", _keep),
+    "right_time": alsStream.rule("AudioClip/ScrollerTimePreserver/RightTime", _keep),
+}
+
+def _flac_name(tag, value):
+    """
+    Returns the plain FLAC file name referenced by a path attribute value.
+    """
+    value = value.decode("utf-8")
+    if tag == b"BrowserContentPath":
+        return unquote(value.rsplit("#", 1)[-1].rsplit("/", 1)[-1])
+    return value.replace("\\", "/").rsplit("/", 1)[-1]
+
+def _scope_stem(scope):
+    """
+    Stem of the first FLAC referenced inside a SampleRef scope.
+    """
+    for values in scope["values"].values():
+        for value in values:
+            stem = stemClassifier.classify(value.replace("\\", "/").rsplit("/", 1)[-1])
+            if stem:
+                return stem
+    return None
+
+def compile_template(xml_data):
+    """
+    Finds every stem slot in a decompressed template in one scan per slot family
+    (loop markers through the scope-aware stream editor, see MARKER_RULES).
+    Returns {"stems": {stem: template FLAC name}, "slots": [(start, end, kind, stem), ...]}
+    where start/end delimit an attribute value and kind is one of
+    "LoopEnd", "OutMarker", "path", "relative_path", "url", "name", "tempo", "beats", "seconds"
+    or one of the SAMPLE_TAGS kinds ("file_size", "mod_date", "frames", "sample_rate").
+    Each stem's AudioTrack is also bracketed by empty "track" / "track_end" slots, so a set can
+    leave stems out (see fill_template). "bpm" is the tempo the template's clips are warped to,
+    else its master tempo (Tempo/Manual); None if it has neither.
+    """
+    slots = []
+    stems = {}
+    tempo_rules = list(TEMPO_RULES.values())
+    tempo_target = None
+    tempo_events = []
+    manual_tempo = None
+    sample_kinds = {id(rule): kind for kind, rule in SAMPLE_RULES.items()}
+    for start, end, rule, _, scope in alsStream.find_matches(xml_data, MARKER_RULES + tempo_rules +
+                                                              list(SAMPLE_RULES.values())):
+        if rule in MARKER_RULES:
+            slots.append((start, end, rule["tag"], None))
+        elif id(rule) in sample_kinds:
+            slots.append((start, end, sample_kinds[id(rule)], _scope_stem(scope)))
+        elif rule is TEMPO_RULES[TEMPO_TARGET_PATH]:
+            tempo_target = xml_data[start:end].decode()
+        elif rule is TEMPO_RULES["tempo_event"]:
+            tempo_events.append((start, end, scope["values"].get("PointeeId")))
+        else:
+            if rule is tempo_rules[0]:
+                manual_tempo = float(xml_data[start:end])
+            slots.append((start, end, "tempo" if rule is tempo_rules[0] else "beats", None))
+    slots += [(start, end, "tempo", None) for start, end, pointee in tempo_events if pointee == [tempo_target]]
+
+    bpm = None
+    for match in WARP_PATTERN.finditer(xml_data):
+        sec_time, beat_time = float(match.group(1)), float(match.group(2))
+        if sec_time:
+            bpm = bpm or round(beat_time * 60 / sec_time, 6)
+            slots.append((match.start(1), match.end(1), "seconds", None))
+    # The per-BPM templates keep the master tempo of the set they were made from, so the warp
+    # tempo comes first; a template without warped clips is at its master tempo
+    bpm = bpm or manual_tempo
+
+    for match in PATH_PATTERN.finditer(xml_data):
+        flac_name = _flac_name(match.group(1), match.group(2))
+        stem = stemClassifier.classify(flac_name)
+        if stem is None:
+            continue
+        stems.setdefault(stem, flac_name)
+        slots.append((match.start(2), match.end(2), PATH_TAGS[match.group(1).decode()], stem))
+
+    if stems:
+        names = {alsRewrite.xml_attr(flac_name[:-len(".flac")]): stem for stem, flac_name in stems.items()}
+        name_pattern = re.compile(rb'<(?:' + b"|".join(t.encode() for t in alsRewrite.NAME_TAGS) + rb') Value="('
+                                  + b"|".join(re.escape(n) for n in names) + rb')"')
+        for match in name_pattern.finditer(xml_data):
+            slots.append((match.start(1), match.end(1), "name", names[match.group(1)]))
+
+    for match in TRACK_START.finditer(xml_data):
+        end = xml_data.find(TRACK_END, match.end())
+        if end < 0:
+            break
+        end += len(TRACK_END)
+        stem = next((slot[3] for slot in slots if slot[3] and match.start() < slot[0] < end), None)
+        if stem:
+            slots.append((match.start(), match.start(), "track", stem))
+            slots.append((end, end, "track_end", stem))
+
+    # A track ends where the next one starts: close it first
+    slots.sort(key=lambda slot: (slot[0], slot[1], slot[2] != "track_end"))
+    return {"stems": stems, "slots": slots, "bpm": bpm}
+
+def _source_info(path, raw=None):
+    stat = os.stat(path)
+    info = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if raw is not None:
+        info["sha1"] = hashlib.sha1(raw).hexdigest()
+    return info
+
+def load_slot_index(template_path, raw):
+    """
+    Returns the compiled slots for a template, from its sidecar when still valid.
+    The sidecar is trusted when size+mtime match; otherwise the content hash decides,
+    and the template is recompiled (and the sidecar rewritten) only if it really changed.
+    Returns (compiled, xml_data_or_None) – xml_data is set when a recompile had to decompress.
+    """
+    index_path = template_path + SLOT_INDEX_SUFFIX
+    source = _source_info(template_path)
+    index = _read_index(index_path)
+
+    if index and index.get("version") == SLOT_INDEX_VERSION:
+        cached = index.get("source", {})
+        if cached.get("size") == source["size"] and cached.get("mtime_ns") == source["mtime_ns"]:
+            return _from_index(index), None
+        source = _source_info(template_path, raw)
+        if cached.get("sha1") == source["sha1"]:
+            index["source"] = source
+            _write_index(index_path, index)
+            return _from_index(index), None
+
+    xml_data = gzip.decompress(raw)
+    compiled = compile_template(xml_data)
+    if "sha1" not in source:
+        source = _source_info(template_path, raw)
+    _write_index(index_path, {
+        "version": SLOT_INDEX_VERSION,
+        "source": source,
+        "stems": compiled["stems"],
+        "slots": [list(slot) for slot in compiled["slots"]],
+        "bpm": compiled["bpm"],
+    })
+    return compiled, xml_data
+
+def _read_index(index_path):
+    try:
+        with open(index_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def template_fingerprint(template_path):
+    """
+    Returns the SHA-1 of a template file.
+    While its sidecar index is valid the hash comes from there, so the .als is not opened.
+    """
+    index = _read_index(template_path + SLOT_INDEX_SUFFIX)
+    if index and index.get("version") == SLOT_INDEX_VERSION:
+        source = _source_info(template_path)
+        cached = index.get("source", {})
+        if cached.get("size") == source["size"] and cached.get("mtime_ns") == source["mtime_ns"]:
+            return cached["sha1"]
+    with open(template_path, "rb") as f:
+        raw = f.read()
+    load_slot_index(template_path, raw)
+    return hashlib.sha1(raw).hexdigest()
+
+def _from_index(index):
+    return {"stems": index["stems"], "slots": [tuple(slot) for slot in index["slots"]], "bpm": index["bpm"]}
+
+def _write_index(index_path, index):
+    try:
+        alsRewrite.write_atomic(index_path, json.dumps(index, separators=(",", ":")).encode("utf-8"))
+    except OSError as e:
+        # A read-only template folder only costs a recompile next run
+        print(f"⚠️ Warning: Could not write slot index '{index_path}': {e}")
+
+def load_template(template_path):
+    """
+    Loads a template as precomputed segments: the literal bytes between slots plus the slot list.
+    Rendering is then a single linear join (see fill_template).
+    """
+    with open(template_path, "rb") as f:
+        raw = f.read()
+    compiled, xml_data = load_slot_index(template_path, raw)
+    if xml_data is None:
+        xml_data = gzip.decompress(raw)
+    segments = []
+    last = 0
+    for start, end, _, _ in compiled["slots"]:
+        segments.append(xml_data[last:start])
+        last = end
+    segments.append(xml_data[last:])
+    return {
+        "path": template_path,
+        "stems": compiled["stems"],
+        "slots": compiled["slots"],
+        "bpm": compiled["bpm"],
+        "values": [xml_data[start:end] for start, end, _, _ in compiled["slots"]],
+        "segments": segments,
+        "size": len(xml_data),
+    }
+
+# Slot kind -> key of the per-stem `samples` values in fill_template
+SAMPLE_FIELDS = {"path": "path", "relative_path": "relative_path", "url": "url", "file_size": "size",
+                 "mod_date": "mod_date", "frames": "frames", "sample_rate": "sample_rate"}
+
+def format_number(value):
+    """
+    Formats a float the way Live writes numbers: shortest round-trip digits, never exponents.
+    """
+    text = repr(float(value))
+    if "e" in text:
+        text = f"{float(value):.25f}".rstrip("0")
+    return text[:-2] if text.endswith(".0") else text
+
+def fill_template(template, track_names, loop_end=None, verbose=True, bpm=None, stems=None, samples=None):
+    """
+    Renders a set by splicing new values between the template's precomputed segments.
+    `track_names` maps stems to new FLAC paths (missing stems keep the template value).
+    `samples` optionally maps stems to complete SampleRef values ("path", "relative_path", "url",
+    "size", "mod_date", "frames", "sample_rate"); without it only the file name inside the
+    template's paths is swapped and the file-level values keep the template's stem data.
+    `stems` optionally lists the stem tracks to keep; the other stems' AudioTracks are left out.
+    When `bpm` differs from the template's own tempo, the master tempo and every tempo-dependent
+    value are rewritten, so one base template can serve any (including fractional) BPM.
+    Returns (xml_data, counts): counts per kind ("LoopEnd", "OutMarker", "path", "name", "tempo").
+    Raises ValueError when `bpm` is given but the template's own tempo is unknown.
+    """
+    if bpm and not template["bpm"]:
+        raise ValueError(f"No tempo found in template '{template.get('path')}' (no warped clip or master tempo).")
+    new_marker = loop_end.encode("ascii") if loop_end else None
+    ratio = bpm / template["bpm"] if bpm and template["bpm"] and float(bpm) != template["bpm"] else None
+    counts = {"LoopEnd": 0, "OutMarker": 0, "path": 0, "name": 0, "tempo": 0}
+    segments = template["segments"]
+    parts = [segments[0]]
+    skipping = False
+    for i, (_, _, kind, stem) in enumerate(template["slots"]):
+        if kind == "track":
+            skipping = stems is not None and stem not in stems
+        elif kind == "track_end" and skipping:
+            skipping = False
+            parts.append(segments[i + 1])
+            continue
+        if skipping:
+            continue
+        value = template["values"][i]
+        if kind in alsRewrite.MARKER_TAGS:
+            if new_marker:
+                if verbose:
+                    print(f"   Updated <{kind}> from {value.decode()} to {loop_end}")
+                value = new_marker
+                counts[kind] += 1
+            elif ratio and kind == "LoopEnd":
+                # Templates keep OutMarker as is and only stretch the loop
+                value = format_number(float(value) * ratio).encode("ascii")
+        elif kind in ("tempo", "beats", "seconds"):
+            if ratio:
+                if kind == "tempo":
+                    value = format_number(bpm).encode("ascii")
+                else:
+                    value = format_number(float(value) * ratio if kind == "beats" else float(value) / ratio).encode("ascii")
+                counts["tempo"] += 1
+        elif kind in ("track", "track_end"):
+            pass
+        elif samples and samples.get(stem) and kind in SAMPLE_FIELDS:
+            new = samples[stem][SAMPLE_FIELDS[kind]]
+            if new is not None:
+                value = alsRewrite.xml_attr(str(new))
+                if kind in ("path", "relative_path", "url"):
+                    counts["path"] += 1
+        elif kind in SAMPLE_TAGS.values():
+            pass
+        elif track_names.get(stem):
+            new = track_names[stem]
+            old = template["stems"][stem]
+            if kind == "name":
+                value = alsRewrite.xml_attr(os.path.basename(new).replace(".flac", ""))
+                counts["name"] += 1
+            else:
+                if kind == "url":
+                    old, new = old.replace(" ", "%20"), new.replace(" ", "%20")
+                value = value.replace(alsRewrite.xml_attr(old), alsRewrite.xml_attr(new))
+                counts["path"] += 1
+        parts.append(value)
+        parts.append(segments[i + 1])
+    return b"".join(parts), counts
+
+def describe_fill(template, track_names, loop_end=None, bpm=None, stems=None, samples=None):
+    """
+    What fill_template() with the same arguments puts in a set, without rendering it:
+    {"stems": {stem: sample path (first Path of the stem)}, "loop_end": largest stem clip LoopEnd in beats}.
+    Stems the set does not replace keep the template's sample path.
+    """
+    from html import unescape
+    ratio = bpm / template["bpm"] if bpm and template["bpm"] and float(bpm) != template["bpm"] else None
+    paths, loop_ends = {}, []
+    skipping = False
+    for value, (_, _, kind, stem) in zip(template["values"], template["slots"]):
+        if kind == "track":
+            skipping = stems is not None and stem not in stems
+        elif kind == "track_end":
+            skipping = False
+        if skipping:
+            continue
+        if kind == "LoopEnd":
+            loop_ends.append(float(loop_end) if loop_end else float(value) * (ratio or 1))
+        elif kind == "path" and stem not in paths:
+            if samples and samples.get(stem) and samples[stem]["path"] is not None:
+                paths[stem] = samples[stem]["path"]
+                continue
+            if track_names.get(stem):
+                value = value.replace(alsRewrite.xml_attr(template["stems"][stem]),
+                                      alsRewrite.xml_attr(track_names[stem]))
+            paths[stem] = unescape(value.decode("utf-8"))
+    return {"stems": paths, "loop_end": max(loop_ends) if loop_ends else None}
+
+class TemplateCache:
+    """
+    LRU cache of compiled templates keyed by path, bounded by total decompressed size.
+    Safe to share between threads (--executor thread, the pipeline's I/O threads).
+    """
+
+    def __init__(self, max_bytes=TEMPLATE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, template_path):
+        """
+        Returns the compiled template at `template_path`, loading it on a miss.
+        The load runs outside the lock, so other templates stay available meanwhile.
+        """
+        with self._lock:
+            entry = self._entries.get(template_path)
+            if entry is not None:
+                self._entries.move_to_end(template_path)
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = load_template(template_path)
+        with self._lock:
+            # Another thread may have loaded the same template meanwhile: keep a single copy
+            cached = self._entries.get(template_path)
+            if cached is not None:
+                self._entries.move_to_end(template_path)
+                return cached
+            self._entries[template_path] = entry
+            self.size += entry["size"]
+            while self.size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= evicted["size"]
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+# One cache per process (each batch worker process gets its own)
+_cache = TemplateCache()
+
+def get_template(template_path):
+    """
+    Returns a compiled template from the process-wide cache.
+    """
+    return _cache.get(template_path)
+
+def compile_templates(folder):
+    """
+    Compiles (or re-validates) the slot index of every .als template in `folder`.
+    """
+    for name in sorted(os.listdir(folder)):
+        if name.endswith(".als"):
+            path = os.path.join(folder, name)
+            with open(path, "rb") as f:
+                compiled, _ = load_slot_index(path, f.read())
+            print(f"🧩 {name}: {len(compiled['slots'])} slots, stems {sorted(compiled['stems'])}")
+
+if __name__ == "__main__":
+    compile_templates(sys.argv[1] if len(sys.argv) > 1 else "alsFiles")
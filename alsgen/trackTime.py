@@ -0,0 +1,224 @@
+# trackTime.py
+import os
+import sqlite3
+import threading
+
+# ✅ CONFIG: Persistent duration cache (set to None to disable)
+DURATION_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "alsGen", "durations.sqlite")
+
+# ✅ CONFIG: Silence-aware durations (optional, needs numpy + soundfile)
+SILENCE_THRESHOLD_DB = -60.0  # Blocks with an RMS level below this (dBFS) count as silence
+SILENCE_BLOCK_SECONDS = 0.05  # RMS block length
+ANALYSIS_CHUNK_FRAMES = 1 << 18  # Frames decoded per read, so memory stays bounded whatever the stem length
+
+_memo = {}
+_audible_memo = {}
+_info_memo = {}
+_db = None
+_db_pid = None
+_lock = threading.Lock()  # One connection per process, shared by pipeline and thread-pool workers
+_analysis_warned = False
+
+def read_streaminfo(file_path):
+    """
+    Reads only the first 42 bytes of a FLAC file and decodes its STREAMINFO block.
+    Returns (sample_rate, total_samples), or None when the file needs a full parser
+    (ID3-prefixed files, unknown total length, non-FLAC data).
+    """
+    with open(file_path, "rb") as f:
+        header = f.read(42)
+    # "fLaC", then a metadata block header whose type must be STREAMINFO (0) with length 34
+    if len(header) < 42 or header[:4] != b"fLaC" or header[4] & 0x7F != 0 or header[5:8] != b"\x00\x00\x22":
+        return None
+    # 20 bits sample rate | 3 bits channels | 5 bits bits-per-sample | 36 bits total samples
+    packed = int.from_bytes(header[18:26], "big")
+    sample_rate = packed >> 44
+    total_samples = packed & 0xFFFFFFFFF
+    if not sample_rate or not total_samples:
+        return None
+    return sample_rate, total_samples
+
+def _mutagen_duration(file_path):
+    import mutagen
+    from mutagen.flac import FLAC
+    try:
+        return FLAC(file_path).info.length
+    except mutagen.MutagenError as e:
+        raise Exception(f"Could not process the FLAC file - {e}")
+    except Exception as e:
+        raise Exception(f"Unexpected error: {e}")
+
+def _cache():
+    """
+    Opens the SQLite duration cache once per process (connections must not cross a fork).
+    Call with _lock held.
+    """
+    global _db, _db_pid
+    if DURATION_CACHE_PATH is None:
+        return None
+    if _db_pid != os.getpid():
+        _db, _db_pid = None, os.getpid()
+        try:
+            os.makedirs(os.path.dirname(DURATION_CACHE_PATH), exist_ok=True)
+            _db = sqlite3.connect(DURATION_CACHE_PATH, timeout=30, isolation_level=None, check_same_thread=False)
+            _db.execute("PRAGMA journal_mode=WAL")
+            _db.execute("PRAGMA synchronous=NORMAL")
+            _db.execute("CREATE TABLE IF NOT EXISTS durations ("
+                        "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, seconds REAL)")
+            _db.execute("CREATE TABLE IF NOT EXISTS audible_durations ("
+                        "path TEXT, size INTEGER, mtime_ns INTEGER, threshold_db REAL, block_seconds REAL, "
+                        "seconds REAL, PRIMARY KEY (path, threshold_db, block_seconds))")
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ Warning: Duration cache disabled ({e})")
+            _db = None
+    return _db
+
+def _lookup(sql, params):
+    """
+    First row of a cache query, or None on a miss, an error or a disabled cache.
+    """
+    with _lock:
+        db = _cache()
+        if db is None:
+            return None
+        try:
+            return db.execute(sql, params).fetchone()
+        except sqlite3.Error:
+            return None
+
+def _store(sql, params):
+    with _lock:
+        db = _cache()
+        if db is None:
+            return
+        try:
+            db.execute(sql, params)
+        except sqlite3.Error:
+            pass
+
+def get_track_duration(file_path):
+    """
+    Returns the duration of a FLAC file in seconds.
+    Results are cached by path + size + mtime, so unchanged files are only stat()ed.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The file '{file_path}' does not exist.")
+
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if key in _memo:
+        return _memo[key]
+    row = _lookup("SELECT seconds FROM durations WHERE path = ? AND size = ? AND mtime_ns = ?", key)
+    if row:
+        _memo[key] = row[0]
+        return row[0]
+
+    try:
+        info = read_streaminfo(file_path)
+    except OSError as e:
+        raise Exception(f"Unexpected error: {e}")
+    # Unusual files (ID3 prefix, unknown length) fall back to mutagen's full parser
+    duration = info[1] / info[0] if info else _mutagen_duration(file_path)
+
+    _memo[key] = duration
+    _store("INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?)", key + (duration,))
+    return duration
+
+def get_sample_info(file_path):
+    """
+    Returns the file-level values Live stores for a sample: {"size", "mod_date" (Unix seconds),
+    "frames", "sample_rate"}; frames/sample_rate are None when the length is unknown.
+    Computed once per file version (path, size, mtime) and process, so each stem costs one stat().
+    """
+    stat = os.stat(file_path)
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    info = _info_memo.get(key)
+    if info is None:
+        streaminfo = read_streaminfo(file_path)
+        if streaminfo is None:
+            try:
+                from mutagen.flac import FLAC
+                stream = FLAC(file_path).info
+                streaminfo = (stream.sample_rate, stream.total_samples) if stream.total_samples else None
+            except Exception:
+                streaminfo = None
+        info = _info_memo[key] = {
+            "size": stat.st_size,
+            "mod_date": int(stat.st_mtime),
+            "frames": streaminfo[1] if streaminfo else None,
+            "sample_rate": streaminfo[0] if streaminfo else None,
+        }
+    return info
+
+def _last_sound(file_path, threshold_db, block_seconds):
+    """
+    Decodes a stem backwards from its end, one chunk at a time, and returns the end (in seconds)
+    of its last block whose RMS level reaches `threshold_db`; 0.0 for a silent file.
+    Blocks are aligned to the start of the file, so the result does not depend on the chunk size.
+    """
+    import numpy as np
+    import soundfile as sf
+
+    threshold = 10 ** (threshold_db / 10)  # dBFS -> mean square of samples in [-1, 1]
+    with sf.SoundFile(file_path) as f:
+        block = max(1, int(f.samplerate * block_seconds))
+        chunk = max(block, ANALYSIS_CHUNK_FRAMES // block * block)
+        end = f.frames
+        while end > 0:
+            start = max(0, (end - 1) // block * block - chunk + block)
+            f.seek(start)
+            data = f.read(end - start, dtype="float32", always_2d=True)
+            if not len(data):
+                break
+            blocks = -(-len(data) // block)
+            padded = np.zeros((blocks * block, data.shape[1]), dtype=np.float32)
+            padded[:len(data)] = data
+            # Mean square per block over all channels; the zero padding only makes the last block quieter
+            power = np.square(padded).reshape(blocks, -1).mean(axis=1)
+            loud = np.flatnonzero(power >= threshold)
+            if len(loud):
+                return min(start + (loud[-1] + 1) * block, f.frames) / f.samplerate
+            end = start
+    return 0.0
+
+def get_audible_duration(file_path):
+    """
+    Returns the length of a stem in seconds up to the end of its last non-silent block,
+    ignoring trailing silence and padding. Only the tail is decoded, once per file version:
+    results are cached like get_track_duration's (by path, size, mtime and the silence settings).
+    Falls back to the container duration when numpy or soundfile is not installed.
+    """
+    global _analysis_warned
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The file '{file_path}' does not exist.")
+
+    key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns, SILENCE_THRESHOLD_DB, SILENCE_BLOCK_SECONDS)
+    if key in _audible_memo:
+        return _audible_memo[key]
+    row = _lookup("SELECT seconds FROM audible_durations WHERE path = ? AND size = ? AND mtime_ns = ? "
+                  "AND threshold_db = ? AND block_seconds = ?", key)
+    if row:
+        _audible_memo[key] = row[0]
+        return row[0]
+
+    try:
+        duration = _last_sound(file_path, SILENCE_THRESHOLD_DB, SILENCE_BLOCK_SECONDS)
+    except ImportError as e:
+        if not _analysis_warned:
+            print(f"⚠️ Warning: Silence analysis needs numpy and soundfile ({e}); using container durations.")
+            _analysis_warned = True
+        return get_track_duration(file_path)
+    except RuntimeError as e:  # libsndfile could not decode the file
+        raise Exception(f"Could not decode the FLAC file - {e}")
+
+    _audible_memo[key] = duration
+    _store("INSERT OR REPLACE INTO audible_durations VALUES (?, ?, ?, ?, ?, ?)", key + (duration,))
+    return duration
+
+if __name__ == "__main__":
+    file_path = "drums-PHILDEL - The Wolf.flac"
+    duration = get_track_duration(file_path)
+    print(f"Duration: {duration:.2f} seconds")
@@ -0,0 +1,297 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import signal
+import struct
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from . import alsRewrite
+from . import batchGen
+from . import instrumentation
+from . import stemScanner
+from . import trackTime
+
+# ✅ CONFIG: Watch mode
+WATCH_BACKEND = "auto"  # "inotify" (Linux), "poll", or "auto" (inotify when available)
+WATCH_DEBOUNCE = 5.0  # Seconds a track folder must stay quiet before it is generated
+WATCH_POLL_INTERVAL = 10.0  # Seconds between tree scans with the polling backend
+WATCH_WORKERS = os.cpu_count() or 1  # Folders generated at once
+WATCH_STATUS_NAME = ".alsGen-status.json"  # Status/health file, stored at the root of the STEMS folder
+WATCH_STATUS_INTERVAL = 2.0  # Seconds between status file updates (doubles as a heartbeat)
+WATCH_REQUIRED_STEMS = ("drums", "Inst", "vocals")  # A folder is generated once all of these stems are present
+
+TRACK_DEPTH = 3  # <root>/<bpm>/<key>/<track>
+
+# inotify(7) constants
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+def _depth(root, path):
+    rel = os.path.relpath(path, root)
+    return 0 if rel == "." else rel.count(os.sep) + 1
+
+def _track_folders(root, path):
+    """
+    Track folders at or below `path` (walks at most down to track depth).
+    """
+    depth = _depth(root, path)
+    if depth == TRACK_DEPTH:
+        return [path]
+    if depth > TRACK_DEPTH:
+        return []
+    folders = []
+    for entry in stemScanner._subdirs(path):
+        folders.extend(_track_folders(root, entry.path))
+    return folders
+
+class InotifyWatcher:
+    """
+    Reports changed track folders from Linux inotify events. Only the BPM/key/track directories
+    are watched (one watch each), so no scan is needed after startup.
+    """
+    name = "inotify"
+
+    def __init__(self, root):
+        self.root = root
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.paths = {}  # watch descriptor -> directory
+        self.pending = set(self._add_tree(root))
+
+    def _add_tree(self, path):
+        """
+        Watches `path` and its subdirectories down to track depth; returns the track folders found,
+        since files may have landed before the watch existed.
+        """
+        if _depth(self.root, path) > TRACK_DEPTH:
+            return []
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            # ENOSPC: fs.inotify.max_user_watches is too low for the tree
+            print(f"⚠️ Warning: Could not watch '{path}': {os.strerror(error)}")
+            return []
+        self.paths[wd] = path
+        if _depth(self.root, path) == TRACK_DEPTH:
+            return [path]
+        folders = []
+        for entry in stemScanner._subdirs(path):
+            folders.extend(self._add_tree(entry.path))
+        return folders
+
+    def poll(self, timeout):
+        """
+        Waits up to `timeout` seconds and returns the set of track folders that changed.
+        """
+        changed, self.pending = self.pending, set()
+        if changed:
+            timeout = 0
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return changed
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0")
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were lost: fall back to one scan of the whole tree
+                print("⚠️ Warning: inotify queue overflow, rescanning the STEMS folder.")
+                changed.update(_track_folders(self.root, self.root))
+                continue
+            directory = self.paths.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.paths[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            depth = _depth(self.root, directory)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                changed.update(self._add_tree(path))
+            elif depth == TRACK_DEPTH and name.lower().endswith(b".flac"):
+                # Only stems count: the sets written into the folder must not retrigger it
+                changed.add(directory)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class PollWatcher:
+    """
+    Portable fallback: rescans the tree every WATCH_POLL_INTERVAL seconds and reports
+    track folders whose FLAC names, sizes or mtimes changed.
+    """
+    name = "poll"
+
+    def __init__(self, root, interval=None):
+        self.root = root
+        self.interval = interval or WATCH_POLL_INTERVAL
+        self.signatures = {}
+        self.next_scan = 0.0
+
+    def poll(self, timeout):
+        wait = self.next_scan - time.monotonic()
+        if wait > 0:
+            time.sleep(min(wait, timeout))
+            return set()
+        self.next_scan = time.monotonic() + self.interval
+        signatures = {}
+        for folder, _, _, entries in stemScanner.scan_track_folders(self.root):
+            signatures[folder] = tuple((e.name, e.stat().st_size, e.stat().st_mtime_ns) for e in entries)
+        changed = {folder for folder, signature in signatures.items() if self.signatures.get(folder) != signature}
+        self.signatures = signatures
+        return changed
+
+    def close(self):
+        pass
+
+def make_watcher(root, backend=None):
+    backend = backend or WATCH_BACKEND
+    if backend in ("auto", "inotify"):
+        try:
+            return InotifyWatcher(root)
+        except (OSError, AttributeError) as e:  # no inotify (macOS, Windows) or no libc
+            if backend == "inotify":
+                raise
+            print(f"ℹ️ inotify unavailable ({e}); polling every {WATCH_POLL_INTERVAL:g}s instead.")
+    return PollWatcher(root)
+
+def stems_complete(paths):
+    """
+    True when every stem looks fully written: a readable STREAMINFO block with a known length.
+    """
+    for path in paths:
+        try:
+            info = trackTime.read_streaminfo(path)
+        except OSError:
+            return False
+        if not info or not info[1]:
+            return False
+    return True
+
+def _write_status(path, status):
+    try:
+        alsRewrite.write_atomic(path, (json.dumps(status, indent=2) + "\n").encode("utf-8"))
+    except OSError as e:
+        print(f"⚠️ Warning: Could not write status file '{path}': {e}")
+
+def run_watch(root, ready_job, worker, report=None, workers=None, executor=None, backend=None,
+              debounce=None, status_path=None, setup=None):
+    """
+    Watches `root` and generates each track folder once its writes have settled.
+    `ready_job(folder)` returns the job for a folder, or None while its stems are incomplete
+    (or already up to date); `worker(job)` runs in a bounded pool like batchGen.run_batch workers,
+    and `report(index, result)` receives every result. Every folder is checked once at startup,
+    so `ready_job` should skip up-to-date folders (e.g. through the build manifest).
+    A JSON status file is rewritten every few seconds; stops cleanly on Ctrl+C or SIGTERM.
+    `setup` is passed to batchGen.init_worker() in process workers.
+    """
+    workers = workers or WATCH_WORKERS
+    executor = executor or batchGen.BATCH_EXECUTOR
+    debounce = WATCH_DEBOUNCE if debounce is None else debounce
+    status_path = status_path or os.path.join(root, WATCH_STATUS_NAME)
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=workers, **batchGen.pool_options(setup))
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers)
+    capture = executor == "process"
+    watcher = make_watcher(root, backend)
+    print(f"👀 Watching {root} ({watcher.name}, {debounce:g}s debounce, {workers} {executor} workers)")
+
+    dirty = {}  # folder -> monotonic time of its last change
+    queue = deque()
+    running = {}  # future -> folder
+    counts = Counter()
+    recent = deque(maxlen=20)
+    started = time.time()
+    next_status = 0.0
+    stopping = []
+
+    def stop(*_):
+        stopping.append(True)
+
+    def collect(future):
+        folder = running.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:  # e.g. a worker process died
+            result = {"job": (folder,), "status": "failed", "error": f"{e.__class__.__name__}: {e}",
+                      "log": "", "seconds": 0.0, "metrics": None, "details": None}
+        instrumentation.merge(result.get("metrics"))
+        batchGen.count_result(result["status"])
+        counts[result["status"]] += 1
+        recent.append({"folder": folder, "status": result["status"], "error": result["error"],
+                       "seconds": round(result["seconds"], 3), "finished_at": time.time()})
+        if report:
+            report(sum(counts.values()) - 1, result)
+
+    previous_handler = signal.signal(signal.SIGTERM, stop)
+    try:
+        while not stopping:
+            try:
+                for folder in watcher.poll(0.5 if (dirty or queue or running) else 1.0):
+                    dirty[folder] = time.monotonic()
+            except KeyboardInterrupt:
+                break
+
+            now = time.monotonic()
+            busy = set(running.values()) | {job[0] for job in queue}
+            for folder, changed_at in list(dirty.items()):
+                if now - changed_at < debounce or folder in busy:
+                    continue  # still settling, or queued/being generated: picked up again after it finishes
+                del dirty[folder]
+                if not os.path.isdir(folder):
+                    continue
+                job = ready_job(folder)
+                if job is not None:
+                    queue.append(job)
+
+            while queue and len(running) < workers:
+                job = queue.popleft()
+                running[pool.submit(batchGen._run_job, worker, job, capture)] = job[0]
+
+            for future in [f for f in running if f.done()]:
+                collect(future)
+
+            if now >= next_status:
+                next_status = now + WATCH_STATUS_INTERVAL
+                _write_status(status_path, {
+                    "state": "watching", "pid": os.getpid(), "backend": watcher.name,
+                    "started_at": started, "updated_at": time.time(),
+                    "waiting": len(dirty), "queued": len(queue), "running": len(running),
+                    "done": dict(counts), "recent": list(recent),
+                })
+    finally:
+        signal.signal(signal.SIGTERM, previous_handler)
+        print("🛑 Stopping watch mode, finishing running jobs...")
+        pool.shutdown(wait=True)
+        for future in list(running):
+            collect(future)
+        watcher.close()
+        _write_status(status_path, {
+            "state": "stopped", "pid": os.getpid(), "backend": watcher.name,
+            "started_at": started, "updated_at": time.time(), "done": dict(counts), "recent": list(recent),
+        })
+    return counts
@@ -0,0 +1,104 @@
+"""
+Set catalog benchmark.
+
+Fills a temporary catalog (see setCatalog.py) with a synthetic library of N sets, then times
+recording sets one transaction at a time (as generation does), bulk writes (as the indexer
+does) and the catalog queries (best of N runs).
+
+Usage:
+    python benchmarks/bench_catalog.py [--sets 50000] [--repeat 20] [--output results.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alsgen import setCatalog  # noqa: E402
+import synthetic_stems  # noqa: E402
+
+def synthetic_infos(root, count, seed=1):
+    """
+    Catalog entries of `count` CH1.als sets in <root>/<bpm>/<key>/<track> folders; about one set
+    in ten has no vocals of its own and keeps the template's.
+    """
+    rng = random.Random(seed)
+    for i in range(count):
+        folder = os.path.join(root, str(rng.randint(70, 140)), rng.choice(synthetic_stems.KEYS), f"Track {i}")
+        stems = {stem: os.path.join(folder, f"{stem}-Track {i}.flac") for stem in synthetic_stems.STEMS}
+        if rng.random() < 0.1:
+            stems["vocals"] = "/Templates/vocals-Template.flac"
+        info = setCatalog.set_info(os.path.join(folder, "CH1.als"), stems, rng.uniform(100, 600),
+                                   template=f"alsFiles/{folder.split(os.sep)[-3]}.als")
+        yield dict(info, size=100000 + i, mtime_ns=i)
+
+def best_ms(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+    return round(min(times), 3), len(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sets", type=int, default=50000, help="Sets in the synthetic library")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+    parser.add_argument("--output", help="Save the results as JSON")
+    args = parser.parse_args()
+
+    results = {"sets": args.sets}
+    with tempfile.TemporaryDirectory() as tmp:
+        setCatalog.configure(os.path.join(tmp, "catalog.sqlite"))
+        root = os.path.join(tmp, "STEMS")
+        infos = list(synthetic_infos(root, args.sets))
+        with setCatalog._lock:
+            db = setCatalog._connect()
+
+        start = time.perf_counter()
+        for i in range(0, len(infos), setCatalog.INDEX_BATCH_SIZE):
+            with setCatalog._lock:
+                setCatalog._write(db, infos[i:i + setCatalog.INDEX_BATCH_SIZE])
+        elapsed = time.perf_counter() - start
+        results["bulk_write_sets_per_s"] = round(len(infos) / elapsed)
+        print(f"📚 Bulk write: {len(infos)} sets in {elapsed:.2f}s ({results['bulk_write_sets_per_s']} sets/s)")
+
+        sample = infos[len(infos) // 2]
+        single = infos[:200]
+        start = time.perf_counter()
+        for info in single:
+            with setCatalog._lock:
+                setCatalog._write(db, [info])
+        results["record_ms"] = round((time.perf_counter() - start) / len(single) * 1000, 3)
+        print(f"✍️ Record (one set per transaction): {results['record_ms']} ms/set")
+
+        queries = {
+            "sets at a BPM and key": lambda: setCatalog.find_sets(bpm=sample["bpm"], key=sample["key"]),
+            "sets by track name": lambda: setCatalog.find_sets(track=sample["track"]),
+            "sets using a stem (path)": lambda: setCatalog.sets_using(sample["stems"]["drums"]),
+            "sets using a stem (name)": lambda: setCatalog.sets_using(os.path.basename(sample["stems"]["Inst"])),
+            "sets using a template sample": lambda: setCatalog.sets_using("vocals-Template.flac"),
+            "missing vocals at BPM/key": lambda: setCatalog.missing_stem("vocals", bpm=sample["bpm"],
+                                                                        key=sample["key"]),
+            "missing vocals (library)": lambda: setCatalog.missing_stem("vocals"),
+        }
+        results["queries"] = {}
+        print(f"🔎 Queries over {args.sets} sets (best of {args.repeat}):")
+        for name, query in queries.items():
+            ms, rows = best_ms(query, args.repeat)
+            results["queries"][name] = {"ms": ms, "rows": rows}
+            print(f"   {name:<32} {ms:9.3f} ms  {rows:6d} rows")
+        setCatalog.configure(None)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"📄 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compression level benchmark: output size against time on the alsFiles/*.als templates.
+
+Every template is decompressed once, then recompressed at each gzip level with the standard
+single-threaded writer and with the block-parallel writer (parallelGzip.py). Each result is
+checked to decompress back to the original XML.
+
+Usage: python benchmarks/bench_compression.py [--limit N] [--levels 1,6,9] [--threads N] [--repeat N]
+"""
+import argparse
+import glob
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from alsgen import alsRewrite  # noqa: E402
+
+def time_compress(documents, level, threads, repeat):
+    """
+    Best-of-`repeat` seconds to compress all documents, and the total compressed size.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [alsRewrite.compress_als(xml_data, level=level, threads=threads) for xml_data in documents]
+        best = min(best, time.perf_counter() - start)
+    for xml_data, als_data in zip(documents, outputs):
+        if gzip.decompress(als_data) != xml_data:
+            sys.exit(f"❌ Round-trip mismatch at level {level} with {threads} thread(s)")
+    return best, sum(len(als_data) for als_data in outputs)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--templates", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alsFiles"))
+    parser.add_argument("--limit", type=int, default=10, help="Number of templates to use (0 = all)")
+    parser.add_argument("--levels", default="1,2,3,4,5,6,7,8,9", help="Comma-separated gzip levels")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Threads for the parallel writer")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions")
+    args = parser.parse_args()
+
+    templates = sorted(glob.glob(os.path.join(args.templates, "*.als")))
+    if args.limit:
+        templates = templates[:args.limit]
+    if not templates:
+        sys.exit(f"No templates found in {args.templates}")
+    documents = [alsRewrite.read_als(path) for path in templates]
+    raw = sum(len(xml_data) for xml_data in documents)
+    baseline = sum(os.path.getsize(path) for path in templates)
+
+    n = len(documents)
+    print(f"Templates: {n}, {raw / n / 1024:.0f} KiB XML each, shipped .als {baseline / n / 1024:.0f} KiB "
+          f"(best of {args.repeat}, parallel writer with {args.threads} threads)")
+    print(f"{'level':>5} {'writer':>9} {'ms/set':>8} {'KiB/set':>8} {'ratio':>6} {'MB/s':>7}")
+    writers = [("gzip", 1)] + ([("parallel", args.threads)] if args.threads > 1 else [])
+    for level in (int(level) for level in args.levels.split(",")):
+        for name, threads in writers:
+            seconds, size = time_compress(documents, level, threads, args.repeat)
+            print(f"{level:>5} {name:>9} {seconds / n * 1000:8.1f} {size / n / 1024:8.1f} "
+                  f"{raw / size:6.1f} {raw / seconds / 1e6:7.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Before/after benchmark for generating one set from each alsFiles/*.als template.
+
+"before" replays the original modify_als_file pipeline (copy, gunzip, ElementTree
+parse + serialize, gunzip again, str.replace/re.sub passes, gzip again);
+"after" is rewrite_als below (one decompress, one regex transform, one compress);
+"cached" fills a pre-analyzed template from templateCache (no decompress or scan).
+
+Usage: python benchmarks/bench_rewrite.py [--limit N] [--repeat N] [--check]
+"""
+import argparse
+import glob
+import gzip
+import os
+import re
+import shutil
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+from io import BytesIO
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from alsgen import alsRewrite  # noqa: E402
+from alsgen import templateCache  # noqa: E402
+
+TRACK_FOLDER = "128/8A/Bench Track"
+TRACK_NAMES = {
+    "drums": f"{TRACK_FOLDER}/drums-Bench Track.flac",
+    "Inst": f"{TRACK_FOLDER}/Inst-Bench Track.flac",
+    "vocals": f"{TRACK_FOLDER}/vocals-Bench Track.flac",
+}
+REPLACEMENTS = {
+    "drums-Tape B - i won't be ur drug.flac": TRACK_NAMES["drums"],
+    "Inst-Tape B - i won't be ur drug.flac": TRACK_NAMES["Inst"],
+    "vocals-Tape B - i won't be ur drug.flac": TRACK_NAMES["vocals"],
+}
+LOOP_END = "426.666667"
+
+def legacy_modify(input_path, output_als, target_folder):
+    """
+    The pre-alsRewrite pipeline, minus the per-element prints.
+    """
+    shutil.copy(input_path, output_als)
+    with gzip.open(output_als, "rb") as f:
+        als_data = f.read()
+    tree = ET.parse(BytesIO(als_data))
+    for elem in tree.getroot().iter():
+        if elem.tag in ("LoopEnd", "OutMarker"):
+            elem.set("Value", LOOP_END)
+    with gzip.open(output_als, "wb") as f_out:
+        tree.write(f_out, encoding="utf-8", xml_declaration=True)
+    with gzip.open(output_als, "rb") as f:
+        als_str = f.read().decode("latin1")
+    for old, new in REPLACEMENTS.items():
+        als_str = als_str.replace(old, new)
+        als_str = als_str.replace(f"../{old}", f"../{new}")
+        als_str = als_str.replace(f"{target_folder}/{old}", f"{target_folder}/{new}")
+        als_str = als_str.replace(old.replace(" ", "%20"), new.replace(" ", "%20"))
+    for old, new in REPLACEMENTS.items():
+        old_track_name = old.replace(".flac", "")
+        new_track_name = os.path.basename(new).replace(".flac", "")
+        for tag in ("MemorizedFirstClipName", "UserName", "Name", "EffectiveName"):
+            als_str = re.sub(rf'(<{tag} Value="){re.escape(old_track_name)}(")', rf'\1{new_track_name}\2', als_str)
+    with gzip.open(output_als, "wb") as f:
+        f.write(als_str.encode("latin1"))
+
+# The regex single-pass rewrite that preceded templateCache, kept here as the "after" pipeline.
+# Unlike the generator it updates every <LoopEnd>/<OutMarker>, not only those of stem clips.
+
+def build_rewrite(replacements, loop_end=None, verbose=True):
+    """
+    Compiles all edits for one set into a single regex and its substitution callback.
+    `replacements` maps template FLAC names to new FLAC paths; a path is swapped wherever
+    it appears (plain or %20-encoded), and the matching clip/track names are renamed.
+    `loop_end` (a string) replaces every <LoopEnd>/<OutMarker> value when given.
+    Returns (pattern, callback, counts).
+    """
+    paths = {}
+    names = {}
+    for old, new in replacements.items():
+        if not new:
+            continue
+        paths[alsRewrite.xml_attr(old)] = alsRewrite.xml_attr(new)
+        paths[alsRewrite.xml_attr(old.replace(" ", "%20"))] = alsRewrite.xml_attr(new.replace(" ", "%20"))
+        names[alsRewrite.xml_attr(old.replace(".flac", ""))] = alsRewrite.xml_attr(os.path.basename(new).replace(".flac", ""))
+
+    alternatives = []
+    if loop_end:
+        alternatives.append(rb'(?P<marker><(?P<marker_tag>' + b"|".join(t.encode() for t in alsRewrite.MARKER_TAGS) + rb') Value=")(?P<old_value>[^"]*)"')
+    if names:
+        alternatives.append(rb'(?P<name><(?:' + b"|".join(t.encode() for t in alsRewrite.NAME_TAGS) + rb') Value=")(?P<old_name>'
+                            + b"|".join(re.escape(n) for n in names) + rb')"')
+    if paths:
+        # Longest first so a name is never shadowed by one of its prefixes
+        alternatives.append(rb'(?P<path>' + b"|".join(re.escape(p) for p in sorted(paths, key=len, reverse=True)) + rb')')
+    if not alternatives:
+        return None, None, {}
+
+    new_marker = loop_end.encode("ascii") if loop_end else None
+    counts = {"LoopEnd": 0, "OutMarker": 0, "path": 0, "name": 0}
+
+    def substitute(match):
+        groups = match.groupdict()
+        if groups.get("marker"):
+            tag = groups["marker_tag"].decode()
+            counts[tag] += 1
+            if verbose:
+                print(f"   Updated <{tag}> from {groups['old_value'].decode()} to {loop_end}")
+            return groups["marker"] + new_marker + b'"'
+        if groups.get("name"):
+            counts["name"] += 1
+            return groups["name"] + names[groups["old_name"]] + b'"'
+        counts["path"] += 1
+        return paths[groups["path"]]
+
+    return re.compile(b"|".join(alternatives)), substitute, counts
+
+def rewrite_als_bytes(xml_data, replacements, loop_end=None, verbose=True):
+    """
+    Applies the LoopEnd/OutMarker update, FLAC path swaps and name updates in one scan.
+    Returns (new_xml_data, counts).
+    """
+    pattern, substitute, counts = build_rewrite(replacements, loop_end, verbose)
+    if pattern is None:
+        return xml_data, counts
+    return pattern.sub(substitute, xml_data), counts
+
+def rewrite_als(template_path, output_path, replacements, loop_end=None, verbose=True):
+    """
+    Single-pass ALS generation: one decompress, one transform, one compress, one atomic write.
+    Returns the per-kind edit counts.
+    """
+    xml_data, counts = rewrite_als_bytes(alsRewrite.read_als(template_path), replacements, loop_end, verbose)
+    alsRewrite.write_atomic(output_path, alsRewrite.compress_als(xml_data))
+    return counts
+
+def single_pass(input_path, output_als, target_folder):
+    rewrite_als(input_path, output_als, REPLACEMENTS, LOOP_END, verbose=False)
+
+def cached_fill(input_path, output_als, target_folder):
+    template = templateCache.get_template(input_path)
+    xml_data, _ = templateCache.fill_template(template, TRACK_NAMES, LOOP_END, verbose=False)
+    alsRewrite.write_atomic(output_als, alsRewrite.compress_als(xml_data))
+
+def element_signature(path):
+    """
+    Tag/attribute sequence of a set, used to check both pipelines produce the same document.
+    """
+    with gzip.open(path, "rb") as f:
+        root = ET.parse(f).getroot()
+    return [(elem.tag, sorted(elem.attrib.items())) for elem in root.iter()]
+
+def time_pipeline(func, templates, folder, repeat):
+    output_als = os.path.join(folder, "CH1.als")
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for template in templates:
+            func(template, output_als, folder)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--templates", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alsFiles"))
+    parser.add_argument("--limit", type=int, default=10, help="Number of templates to use (0 = all)")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N repetitions")
+    parser.add_argument("--check", action="store_true", help="Verify both pipelines produce the same elements")
+    args = parser.parse_args()
+
+    templates = sorted(glob.glob(os.path.join(args.templates, "*.als")))
+    if args.limit:
+        templates = templates[:args.limit]
+    if not templates:
+        sys.exit(f"No templates found in {args.templates}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        before = time_pipeline(legacy_modify, templates, folder, args.repeat)
+        after = time_pipeline(single_pass, templates, folder, args.repeat)
+        cached = time_pipeline(cached_fill, templates, folder, args.repeat)
+        if args.check:
+            legacy_out, new_out = os.path.join(folder, "legacy.als"), os.path.join(folder, "new.als")
+            for template in templates:
+                legacy_modify(template, legacy_out, folder)
+                expected = element_signature(legacy_out)
+                for func in (single_pass, cached_fill):
+                    func(template, new_out, folder)
+                    if element_signature(new_out) != expected:
+                        sys.exit(f"❌ Output mismatch for {template} ({func.__name__})")
+            print(f"✅ All pipelines produce identical elements for {len(templates)} templates")
+
+    n = len(templates)
+    print(f"Templates: {n} (best of {args.repeat})")
+    print(f"before (legacy):      {before:.3f}s total, {before / n * 1000:.1f} ms/set")
+    print(f"after (single-pass):  {after:.3f}s total, {after / n * 1000:.1f} ms/set")
+    print(f"cached template:      {cached:.3f}s total, {cached / n * 1000:.1f} ms/set (after warm-up)")
+    print(f"speedup: {before / after:.2f}x single-pass, {before / cached:.2f}x cached")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Startup benchmark for the alsgen command line.
+
+Times short runs end to end in fresh interpreters (best and median of N): bare interpreter
+startup, `alsgen --help`, a scan, a single-folder generate (the job a watch event triggers)
+and a validate of that folder, on a small synthetic STEMS tree (see synthetic_stems.py).
+Also reports which heavy modules each command loaded, so an eager import shows up as a
+regression even when the timings are noisy.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 10] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alsgen import stemScanner  # noqa: E402
+import synthetic_stems  # noqa: E402
+
+# Top-level packages a short run should not need
+HEAVY_MODULES = ("asyncio", "concurrent", "multiprocessing", "ctypes", "mutagen", "numpy", "soundfile",
+                 "xml.etree", "urllib.request", "email", "http")
+
+# Runs one command in-process and prints the heavy modules it loaded as the last stdout line
+RUNNER = """
+import io, json, sys
+from contextlib import redirect_stdout
+from alsgen import cli
+heavy = {heavy!r}
+with redirect_stdout(io.StringIO()):
+    status = cli.main(sys.argv[1:])
+loaded = sorted(h for h in heavy if any(m == h or m.startswith(h + ".") for m in sys.modules))
+print(json.dumps({{"status": status, "loaded": loaded}}))
+"""
+
+def run_case(argv, env, cwd, repeat):
+    """
+    Returns {"best_ms", "median_ms", "status", "loaded"} for `argv` (None = bare interpreter).
+    """
+    command = [sys.executable, "-c", "pass"] if argv is None else \
+        [sys.executable, "-c", RUNNER.format(heavy=HEAVY_MODULES)] + argv
+    times, info = [], {"status": 0, "loaded": []}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        done = subprocess.run(command, cwd=cwd, env=env, capture_output=True, text=True)
+        times.append((time.perf_counter() - start) * 1000)
+        if done.returncode and argv is None:
+            raise RuntimeError(done.stderr)
+        if argv is not None:
+            info = json.loads(done.stdout.strip().splitlines()[-1])
+    return {"best_ms": round(min(times), 2), "median_ms": round(statistics.median(times), 2), **info}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--templates", default=os.path.join(REPO, "alsFiles"))
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per command")
+    parser.add_argument("--output", help="Save the results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stems_root = os.path.join(tmp, "STEMS")
+        synthetic_stems.make_tree(stems_root, bpms=2, keys=2, tracks=3, bpm_values=[120, 128], seed=1)
+        folder = next(stemScanner.scan_track_folders(stems_root))[0]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [REPO, os.environ.get("PYTHONPATH")])),
+                   HOME=tmp)  # keeps the duration cache out of the real one
+        common = ["--templates", os.path.abspath(args.templates), "--serial", "--quiet"]
+        cases = {
+            "python (no imports)": None,
+            "alsgen --help": ["--help"],
+            "alsgen scan": ["scan", stems_root],
+            "alsgen generate (1 folder)": ["generate", stems_root, "--folder", folder, "--full"] + common,
+            "alsgen validate (1 folder)": ["validate", stems_root, "--folder", folder,
+                                           "--report", os.path.join(tmp, "report.json")] + common,
+        }
+        results = {}
+        print(f"🚀 Startup times over {args.repeat} runs ({sys.executable})")
+        for name, argv in cases.items():
+            result = results[name] = run_case(argv, env, tmp, args.repeat)
+            loaded = ", ".join(result["loaded"]) or "-"
+            print(f"   {name:<28} best {result['best_ms']:8.2f} ms  median {result['median_ms']:8.2f} ms  "
+                  f"exit {result['status']}  heavy: {loaded}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "repeat": args.repeat, "results": results}, f, indent=2)
+        print(f"📄 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
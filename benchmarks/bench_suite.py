@@ -0,0 +1,212 @@
+"""
+Benchmark suite for the ALS generation hot path.
+
+Builds a synthetic STEMS tree (see synthetic_stems.py), then times each stage separately
+against the real alsFiles templates: folder scan, FLAC duration probe (cold and cached),
+template load, template fill, gzip compression, atomic write, the legacy gzip/ElementTree
+round-trip, an end-to-end batch run (sets per second) and relocating the generated sets after
+moving the tree. Peak RSS is reported for the
+benchmark process and its workers. Results are saved as JSON so versions can be compared.
+
+Usage:
+    python benchmarks/bench_suite.py [--bpms 4 --keys 2 --tracks 10] [--output results.json]
+    python benchmarks/bench_suite.py --compare old.json new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from alsgen import alsGen  # noqa: E402
+from alsgen import alsRewrite  # noqa: E402
+from alsgen import batchGen  # noqa: E402
+import bench_rewrite  # noqa: E402
+from alsgen import relocateSets  # noqa: E402
+import synthetic_stems  # noqa: E402
+from alsgen import templateCache  # noqa: E402
+from alsgen import trackTime  # noqa: E402
+
+def _peak_rss_mb(who):
+    rss = resource.getrusage(who).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+class StageTimer:
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, items=None):
+        """
+        Times the block; `items` may also be set afterwards through the yielded dict.
+        """
+        info = {"items": items}
+        start = time.perf_counter()
+        yield info
+        seconds = time.perf_counter() - start
+        items = info["items"] or 0
+        self.stages[name] = {
+            "seconds": round(seconds, 6),
+            "items": items,
+            "per_item_ms": round(seconds / items * 1000, 4) if items else None,
+        }
+        per_item = f"{seconds / items * 1000:9.3f} ms/item" if items else ""
+        print(f"   {name:<22} {seconds:8.3f}s  {items:6d} items {per_item}")
+
+def run_suite(args):
+    timer = StageTimer()
+    with tempfile.TemporaryDirectory() as tmp:
+        stems_root = os.path.join(tmp, "STEMS")
+        template_bpms = sorted(int(n[:-4]) for n in os.listdir(args.templates) if n[:-4].isdigit())
+        start = time.perf_counter()
+        synthetic_stems.make_tree(stems_root, args.bpms, args.keys, args.tracks, bpm_values=template_bpms, seed=args.seed)
+        print(f"🧪 Synthetic tree: {args.bpms} BPMs x {args.keys} keys x {args.tracks} tracks "
+              f"in {time.perf_counter() - start:.2f}s")
+
+        alsGen.FLAC_FOLDER = stems_root
+        alsGen.ALS_FILES_FOLDER = args.templates
+        alsGen.CATALOG = False  # Keeps the synthetic sets out of the set catalog
+        trackTime.DURATION_CACHE_PATH = os.path.join(tmp, "durations.sqlite")
+
+        with timer.stage("scan") as info:
+            jobs = list(alsGen.find_flac_folders(stems_root))
+            info["items"] = len(jobs)
+        stems = [os.path.join(stems_root, rel) for _, names, _ in jobs for rel in names.values() if rel]
+
+        with timer.stage("probe (cold)", len(stems)):
+            for path in stems:
+                trackTime.get_track_duration(path)
+        trackTime._memo.clear()
+        with timer.stage("probe (sqlite cache)", len(stems)):
+            for path in stems:
+                trackTime.get_track_duration(path)
+        with timer.stage("probe (memo)", len(stems)):
+            for path in stems:
+                trackTime.get_track_duration(path)
+
+        bpms = sorted({bpm for _, _, bpm in jobs})
+        templates = {}
+        with timer.stage("template load", len(bpms)):
+            for bpm in bpms:
+                templates[bpm] = templateCache.load_template(alsGen.select_blank_als(bpm))
+
+        rendered = []
+        with timer.stage("template fill", len(jobs)):
+            for folder, track_names, bpm in jobs:
+                xml_data, _ = templateCache.fill_template(templates[bpm], track_names, "400.000000", verbose=False)
+                rendered.append((folder, xml_data))
+        compressed = []
+        with timer.stage("compress", len(rendered)):
+            for folder, xml_data in rendered:
+                compressed.append((folder, alsRewrite.compress_als(xml_data)))
+        bytes_in = sum(len(x) for _, x in rendered)
+        bytes_out = sum(len(c) for _, c in compressed)
+        with timer.stage("write", len(compressed)):
+            for folder, als_data in compressed:
+                alsRewrite.write_atomic(os.path.join(folder, "CH1.als"), als_data)
+        del rendered, compressed
+
+        legacy_jobs = jobs[:args.legacy_sets]
+        with timer.stage("legacy gzip+ET", len(legacy_jobs)):
+            for folder, _, bpm in legacy_jobs:
+                bench_rewrite.legacy_modify(alsGen.select_blank_als(bpm), os.path.join(folder, "legacy.als"), folder)
+
+        # End to end through the batch engine (empty template cache, durations from the SQLite cache)
+        trackTime._memo.clear()
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            results = batchGen.run_batch(jobs, alsGen.process_folder, workers=args.workers, executor=args.executor,
+                                         report=None)
+            seconds = time.perf_counter() - start
+        failed = sum(1 for r in results if r["status"] not in ("written", "skipped"))
+        end_to_end = {
+            "sets": len(results),
+            "failed": failed,
+            "seconds": round(seconds, 6),
+            "sets_per_second": round(len(results) / seconds, 3) if seconds else None,
+            "workers": args.workers,
+            "executor": args.executor,
+        }
+        print(f"   {'end-to-end':<22} {seconds:8.3f}s  {len(results):6d} sets "
+              f"({end_to_end['sets_per_second']} sets/s, {failed} failed)")
+
+        moved_root = os.path.join(tmp, "MOVED")
+        os.rename(stems_root, moved_root)
+        with timer.stage("relocate", len(jobs)), contextlib.redirect_stdout(io.StringIO()):
+            relocateSets.relocate_library(moved_root, relocateSets.parse_mapping([f"{stems_root}={moved_root}"]),
+                                          workers=args.workers, executor=args.executor, catalog=False)
+
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {"bpms": args.bpms, "keys": args.keys, "tracks": args.tracks, "seed": args.seed},
+        "stages": timer.stages,
+        "bytes": {"xml": bytes_in, "als": bytes_out},
+        "end_to_end": end_to_end,
+        "peak_rss_mb": {
+            "self": round(_peak_rss_mb(resource.RUSAGE_SELF), 1),
+            "children": round(_peak_rss_mb(resource.RUSAGE_CHILDREN), 1),
+        },
+    }
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"{'stage':<22} {'old ms/item':>12} {'new ms/item':>12} {'change':>8}")
+    for name, stage in new["stages"].items():
+        before = old["stages"].get(name, {}).get("per_item_ms")
+        after = stage["per_item_ms"]
+        change = f"{(after - before) / before * 100:+.1f}%" if before and after is not None else "n/a"
+        print(f"{name:<22} {str(before):>12} {str(after):>12} {change:>8}")
+    before, after = old["end_to_end"]["sets_per_second"], new["end_to_end"]["sets_per_second"]
+    print(f"{'sets/s':<22} {before:>12} {after:>12} {(after - before) / before * 100:+7.1f}%")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for the ALS generation hot path.")
+    parser.add_argument("--bpms", type=int, default=4)
+    parser.add_argument("--keys", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--legacy-sets", type=int, default=5, help="Sets timed through the legacy pipeline")
+    parser.add_argument("--workers", type=int, default=batchGen.BATCH_WORKERS)
+    # Threads share the patched FLAC_FOLDER; spawned processes (macOS default) would not
+    parser.add_argument("--executor", choices=["process", "thread"], default="thread")
+    parser.add_argument("--templates", default=os.path.join(REPO, "alsFiles"))
+    parser.add_argument("--output", help="Write machine-readable results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    results = run_suite(args)
+    print(f"   peak RSS: {results['peak_rss_mb']['self']} MB (self), {results['peak_rss_mb']['children']} MB (workers)")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Builds a synthetic STEMS tree (<root>/<bpm>/<key>/<track>/<stem>-<track>.flac) of small but valid
+FLAC files for benchmarking. Audio is digital silence stored as CONSTANT subframes, so a
+several-minute stem is only a few tens of KB while still decoding to the requested length.
+
+Usage: python benchmarks/synthetic_stems.py ROOT [--bpms 3] [--keys 2] [--tracks 5]
+"""
+import argparse
+import os
+import random
+
+BLOCK_SIZE = 4096
+SAMPLE_RATE_CODES = {88200: 0b0001, 176400: 0b0010, 192000: 0b0011, 8000: 0b0100, 16000: 0b0101,
+                     22050: 0b0110, 24000: 0b0111, 32000: 0b1000, 44100: 0b1001, 48000: 0b1010, 96000: 0b1011}
+KEYS = ["1A", "2A", "3A", "4A", "5A", "6A", "7A", "8A", "9A", "10A", "11A", "12A",
+        "1B", "2B", "3B", "4B", "5B", "6B", "7B", "8B", "9B", "10B", "11B", "12B"]
+STEMS = ("drums", "Inst", "vocals")
+
+def _crc8(data):
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x07) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+    return crc
+
+def _crc16(data):
+    crc = 0
+    for byte in data:
+        crc ^= byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x8005) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+def _utf8_number(n):
+    """
+    FLAC's extended UTF-8 coding of a frame number.
+    """
+    if n < 0x80:
+        return bytes([n])
+    payload = []
+    while True:
+        payload.insert(0, 0x80 | (n & 0x3F))
+        n >>= 6
+        length = len(payload) + 1
+        if n < (1 << (7 - length)):
+            prefix = (0xFF << (8 - length)) & 0xFF
+            return bytes([prefix | n] + payload)
+
+def _frame(number, block_size, rate_code, channels, bits):
+    size_code = 0b1100 if block_size == BLOCK_SIZE else 0b0111  # 4096, or 16-bit (size-1) after the number
+    sample_size_code = {8: 0b001, 16: 0b100, 24: 0b110}[bits]
+    header = bytes([0xFF, 0xF8, (size_code << 4) | rate_code, ((channels - 1) << 4) | (sample_size_code << 1)])
+    header += _utf8_number(number)
+    if size_code == 0b0111:
+        header += (block_size - 1).to_bytes(2, "big")
+    header += bytes([_crc8(header)])
+    # One CONSTANT subframe (type 000000, no wasted bits) of value 0 per channel; byte-aligned for 8/16/24 bits
+    frame = header + (b"\x00" + b"\x00" * (bits // 8)) * channels
+    return frame + _crc16(frame).to_bytes(2, "big")
+
+def write_flac(path, seconds, sample_rate=44100, channels=2, bits=16):
+    """
+    Writes a valid FLAC file of `seconds` of silence.
+    """
+    total = int(round(seconds * sample_rate))
+    streaminfo = (BLOCK_SIZE.to_bytes(2, "big") * 2 + (0).to_bytes(3, "big") * 2
+                  + ((sample_rate << 44) | ((channels - 1) << 41) | ((bits - 1) << 36) | total).to_bytes(8, "big")
+                  + b"\x00" * 16)
+    frames = []
+    for number, offset in enumerate(range(0, total, BLOCK_SIZE)):
+        frames.append(_frame(number, min(BLOCK_SIZE, total - offset), SAMPLE_RATE_CODES[sample_rate], channels, bits))
+    with open(path, "wb") as f:
+        f.write(b"fLaC" + bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo + b"".join(frames))
+
+def make_tree(root, bpms=3, keys=2, tracks=5, bpm_values=None, seed=1, min_seconds=120, max_seconds=300):
+    """
+    Creates bpms x keys x tracks track folders with one FLAC per stem.
+    BPMs are picked from `bpm_values` (default: the 70-140 range covered by alsFiles).
+    Returns the list of created track folders.
+    """
+    rng = random.Random(seed)
+    bpm_values = bpm_values or list(range(70, 141))
+    folders = []
+    for bpm in rng.sample(bpm_values, min(bpms, len(bpm_values))):
+        for key in rng.sample(KEYS, min(keys, len(KEYS))):
+            for i in range(tracks):
+                name = f"Synthetic {bpm} {key} Track {i}"
+                folder = os.path.join(root, str(bpm), key, name)
+                os.makedirs(folder, exist_ok=True)
+                seconds = rng.uniform(min_seconds, max_seconds)
+                for stem in STEMS:
+                    write_flac(os.path.join(folder, f"{stem}-{name}.flac"), seconds + rng.uniform(0, 2))
+                folders.append(folder)
+    return folders
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("root")
+    parser.add_argument("--bpms", type=int, default=3)
+    parser.add_argument("--keys", type=int, default=2)
+    parser.add_argument("--tracks", type=int, default=5)
+    args = parser.parse_args()
+    print(f"Created {len(make_tree(args.root, args.bpms, args.keys, args.tracks))} track folders in {args.root}")
@@ -1,7 +1,5 @@
-import gzip
-import xml.etree.ElementTree as ET
-from io import BytesIO
-import trackTime  # Import the trackTime module
+from alsgen import alsStream
+from alsgen import trackTime  # Import the trackTime module
 
 # Input and output file paths
 input_file = "/Users/alirahimlou/myapps/alsGenerator/70.als"
@@ -25,41 +23,36 @@ duration_beats = (duration_seconds * bpm) / 60
 new_loop_end = f"{duration_beats:.6f}"  # Format as string with 6 decimal places
 print(f"Converted to {bpm} BPM: {new_loop_end} beats")
 
-# Step 3: Read and decompress the .als file
-with gzip.open(input_file, 'rb') as f_in:
-    xml_content = f_in.read()
-
-# Step 4: Parse the XML content
-tree = ET.parse(BytesIO(xml_content))
-root = tree.getroot()
-
-# Step 5: Find and modify LoopEnd values
+# Step 3: Describe the edit. Only LoopEnd values inside a clip's <Loop> block that matches the
+# template block are changed; the block is checked when </Loop> closes, so elements that come
+# after LoopEnd (OutMarker, HiddenLoopEnd, ...) are part of the check.
 target_loop_end = "244.00005281177155"
-modified_count = 0
-
-# Iterate through all elements in the XML tree
-for elem in root.iter():
-    # Check if the element is <LoopEnd> with the target value
-    if elem.tag == "LoopEnd" and elem.get("Value") == target_loop_end:
-        # Modify the LoopEnd value to the FLAC duration in beats
-        elem.set("Value", new_loop_end)
-        modified_count += 1
-        
-        # Optional: Verify the surrounding block
-        parent = elem.find("..")
-        if (parent is not None and
-            parent.find("./LoopStart[@Value='0']") is not None and
-            parent.find("./StartRelative[@Value='0']") is not None and
-            parent.find("./LoopOn[@Value='false']") is not None and
-            parent.find("./OutMarker[@Value='244.00005281177155']") is not None and
-            parent.find("./HiddenLoopStart[@Value='0']") is not None and
-            parent.find("./HiddenLoopEnd[@Value='4']") is not None):
-            print(f"Found and modified a matching block at {ET.tostring(parent, encoding='unicode')[:100]}...")
-
-# Step 6: Write the modified XML back to a gzipped file
-with gzip.open(output_file, 'wb') as f_out:
-    tree.write(f_out, encoding="utf-8", xml_declaration=True)
-
-# Step 7: Report the result
+target_block = {
+    "LoopStart": "0",
+    "StartRelative": "0",
+    "LoopOn": "false",
+    "OutMarker": target_loop_end,
+    "HiddenLoopStart": "0",
+    "HiddenLoopEnd": "4",
+}
+
+def matching_block(scope):
+    return all(scope["values"].get(tag) == [value] for tag, value in target_block.items())
+
+rules = [
+    alsStream.rule(
+        "AudioClip/Loop/LoopEnd",
+        lambda old, scope: new_loop_end if old == target_loop_end else None,
+        scope="Loop",
+        when=matching_block,
+        collect=target_block,
+    )
+]
+
+# Step 4: Stream the template through the editor into the output file (one pass, no tree in memory)
+counts = alsStream.edit_als(input_file, output_file, rules)
+modified_count = counts["AudioClip/Loop/LoopEnd"]
+
+# Step 5: Report the result
 print(f"Modified {modified_count} <LoopEnd> elements from {target_loop_end} to {new_loop_end}")
-print(f"Output saved to {output_file}")
\ No newline at end of file
+print(f"Output saved to {output_file}")
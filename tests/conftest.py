@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Run against the checkout, installed or not
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
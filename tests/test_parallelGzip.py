@@ -0,0 +1,34 @@
+import gzip
+import io
+import random
+import pytest
+from alsgen import parallelGzip
+
+BLOCK = 1024
+
+def sample(size, seed=1):
+    """
+    XML-like text with random runs, so blocks both reuse their dictionary and hold fresh bytes.
+    """
+    rng = random.Random(seed)
+    parts = []
+    while sum(map(len, parts)) < size:
+        parts.append(b'<LoopEnd Value="%d" />\n' % rng.randrange(1000) if rng.random() < 0.7
+                     else bytes(rng.randrange(256) for _ in range(rng.randrange(1, 64))))
+    return b"".join(parts)[:size]
+
+@pytest.mark.parametrize("level", [0, 1, 6, 9])
+@pytest.mark.parametrize("size", [0, 1, BLOCK - 1, BLOCK, BLOCK + 1, 3 * BLOCK, 5 * BLOCK + 7])
+def test_round_trips_across_block_boundaries(level, size):
+    data = sample(size)
+    serial = parallelGzip.compress(data, level, threads=1, block_size=BLOCK)
+    threaded = parallelGzip.compress(data, level, threads=4, block_size=BLOCK)
+    assert gzip.decompress(serial) == data
+    assert threaded == serial
+
+def test_round_trips_a_template_sized_document():
+    data = sample(3 * parallelGzip.PARALLEL_BLOCK_SIZE + 12345, seed=2)
+    compressed = parallelGzip.compress(data, 6, threads=3)
+    assert gzip.decompress(compressed) == data
+    with gzip.open(io.BytesIO(compressed)) as f:
+        assert f.read() == data
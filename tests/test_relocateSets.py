@@ -0,0 +1,75 @@
+import os
+import re
+import shutil
+import pytest
+from alsgen import alsGen, alsRewrite, relocateSets, trackTime
+from benchmarks import synthetic_stems
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REFERENCE = re.compile(rb'(<(?:Path|RelativePath|BrowserContentPath) Value=")([^"]*)(")')
+
+@pytest.fixture
+def moved_set(tmp_path, monkeypatch):
+    """
+    A set generated in "Old STEMS", whose whole STEMS folder then moved to "New STEMS".
+    Returns (set path, old root, new root).
+    """
+    old_root, new_root = str(tmp_path / "Old STEMS"), str(tmp_path / "New STEMS")
+    folder = synthetic_stems.make_tree(old_root, bpms=1, keys=1, tracks=1, bpm_values=[128],
+                                       min_seconds=5, max_seconds=6)[0]
+    template = str(tmp_path / "128.als")
+    shutil.copy(os.path.join(REPO, "alsFiles", "128.als"), template)
+    monkeypatch.setattr(alsGen, "FLAC_FOLDER", old_root)
+    monkeypatch.setattr(alsGen, "CATALOG", False)
+    monkeypatch.setattr(trackTime, "DURATION_CACHE_PATH", None)
+    _, track_names, bpm = alsGen.job_for_folder(folder)
+    als_data, _, _ = alsGen.render_als(template, track_names, bpm, "32", verbose=False, set_folder=folder)
+    alsRewrite.write_atomic(os.path.join(folder, "CH1.als"), als_data)
+    os.rename(old_root, new_root)
+    return os.path.join(new_root, os.path.relpath(folder, old_root), "CH1.als"), old_root, new_root
+
+def references(xml_data):
+    return [(m.group(1), m.group(2).decode()) for m in REFERENCE.finditer(xml_data)]
+
+def test_relocate_only_rewrites_file_references(moved_set):
+    set_path, old_root, new_root = moved_set
+    before = alsRewrite.read_als(set_path)
+    mapping = relocateSets.parse_mapping([f"{old_root}={new_root}"])
+    result = relocateSets.relocate_set((set_path, mapping, 6, False))
+    after = alsRewrite.read_als(set_path)
+
+    assert result["status"] == "relocated"
+    # Every byte outside the reference values is untouched
+    assert REFERENCE.sub(rb"\1\3", after) == REFERENCE.sub(rb"\1\3", before)
+    changed = 0
+    for (tag, old), (_, new) in zip(references(before), references(after)):
+        if tag == b'<Path Value="':
+            expected = relocateSets.map_path(old, mapping) or old
+        elif tag == b'<BrowserContentPath Value="':
+            expected = relocateSets.map_url(old, mapping) or old
+        else:
+            expected = old  # The set moved with its stems: relative paths stay valid
+        assert new == expected
+        changed += new != old
+    assert changed == result["edits"]
+    assert old_root.encode() not in after
+
+def test_relocate_leaves_an_unaffected_set_as_it_is(moved_set, tmp_path):
+    set_path, _, new_root = moved_set
+    with open(set_path, "rb") as f:
+        raw = f.read()
+    mtime = os.stat(set_path).st_mtime_ns
+    mapping = relocateSets.parse_mapping([f"{tmp_path / 'Elsewhere'}={new_root}"])
+    assert relocateSets.relocate_set((set_path, mapping, 6, False))["status"] == "unchanged"
+    with open(set_path, "rb") as f:
+        assert f.read() == raw
+    assert os.stat(set_path).st_mtime_ns == mtime
+
+def test_relocate_dry_run_writes_nothing(moved_set):
+    set_path, old_root, new_root = moved_set
+    with open(set_path, "rb") as f:
+        raw = f.read()
+    result = relocateSets.relocate_set((set_path, relocateSets.parse_mapping([f"{old_root}={new_root}"]), 6, True))
+    assert result["status"] == "relocated" and result["edits"]
+    with open(set_path, "rb") as f:
+        assert f.read() == raw
@@ -0,0 +1,264 @@
+"""
+Regression checks for the splice engines (alsStream.StreamEditor, templateCache.fill_template):
+every edited attribute must end up with the value a plain ElementTree edit of the same
+document gives.
+"""
+import gzip
+import io
+import math
+import os
+import re
+import shutil
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote
+import pytest
+from alsgen import alsGen, alsRewrite, alsStream, stemClassifier, templateCache, trackTime
+from benchmarks import synthetic_stems
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATH_TAGS = tuple(templateCache.PATH_TAGS)
+
+def flac_stem(tag, value):
+    """
+    Stem of the FLAC a path attribute points to, or None.
+    """
+    if tag == "BrowserContentPath":
+        value = unquote(value.rsplit("#", 1)[-1])
+    name = value.replace("\\", "/").rsplit("/", 1)[-1]
+    return stemClassifier.classify(name) if name.lower().endswith(".flac") else None
+
+def first_stem(elem):
+    return next((flac_stem(e.tag, e.get("Value")) for e in elem.iter()
+                 if e.tag in PATH_TAGS and flac_stem(e.tag, e.get("Value"))), None)
+
+def stem_clips(root):
+    return [clip for track in root.iter("AudioTrack") for clip in track.iter("AudioClip") if first_stem(clip)]
+
+def scale(elem, factor):
+    elem.set("Value", repr(float(elem.get("Value")) * factor))
+
+def reference_fill(xml_data, track_names, loop_end=None, bpm=None, samples=None):
+    """
+    fill_template() done the ElementTree way: find each element by walking the tree and set its value.
+    """
+    root = ET.fromstring(xml_data)
+    template_stems = {}
+    for elem in root.iter():
+        if elem.tag in PATH_TAGS and flac_stem(elem.tag, elem.get("Value")):
+            name = unquote(elem.get("Value").rsplit("#", 1)[-1]) if elem.tag == "BrowserContentPath" else elem.get("Value")
+            template_stems.setdefault(flac_stem(elem.tag, elem.get("Value")), name.replace("\\", "/").rsplit("/", 1)[-1])
+
+    warp_markers = [m for m in root.iter("WarpMarker") if float(m.get("SecTime"))]
+    if warp_markers:
+        template_bpm = round(float(warp_markers[0].get("BeatTime")) * 60 / float(warp_markers[0].get("SecTime")), 6)
+    else:
+        template_bpm = float(root.find("LiveSet/*/DeviceChain/Mixer/Tempo/Manual").get("Value"))
+    ratio = bpm / template_bpm if bpm and float(bpm) != template_bpm else None
+
+    for clip in stem_clips(root):
+        for tag in alsRewrite.MARKER_TAGS:
+            marker = clip.find(f"Loop/{tag}")
+            if loop_end:
+                marker.set("Value", loop_end)
+            elif ratio and tag == "LoopEnd":
+                scale(marker, ratio)
+
+    if samples:
+        for track in root.iter("AudioTrack"):
+            for sample_ref in track.iter("SampleRef"):
+                values = samples.get(first_stem(sample_ref))
+                for tag, kind in templateCache.SAMPLE_TAGS.items():
+                    for elem in sample_ref.iter(tag):
+                        if values and values[templateCache.SAMPLE_FIELDS[kind]] is not None:
+                            elem.set("Value", str(values[templateCache.SAMPLE_FIELDS[kind]]))
+
+    names = {template_stems[stem][:-len(".flac")]: stem for stem in template_stems}
+    for elem in root.iter():
+        stem = flac_stem(elem.tag, elem.get("Value", "")) if elem.tag in PATH_TAGS else None
+        if stem and samples and samples.get(stem):
+            elem.set("Value", samples[stem][templateCache.SAMPLE_FIELDS[templateCache.PATH_TAGS[elem.tag]]])
+        elif stem and track_names.get(stem):
+            old, new = template_stems[stem], track_names[stem]
+            if elem.tag == "BrowserContentPath":
+                old, new = old.replace(" ", "%20"), new.replace(" ", "%20")
+            elem.set("Value", elem.get("Value").replace(old, new))
+        elif elem.tag in alsRewrite.NAME_TAGS and track_names.get(names.get(elem.get("Value"))):
+            elem.set("Value", os.path.basename(track_names[names[elem.get("Value")]]).replace(".flac", ""))
+
+    if ratio:
+        tempo = root.find("LiveSet/*/DeviceChain/Mixer/Tempo")
+        tempo.find("Manual").set("Value", str(bpm))
+        target = tempo.find("AutomationTarget").get("Id")
+        for envelope in root.iterfind("LiveSet/*/AutomationEnvelopes/Envelopes/AutomationEnvelope"):
+            if envelope.find("EnvelopeTarget/PointeeId").get("Value") == target:
+                for event in envelope.iterfind("Automation/Events/FloatEvent"):
+                    event.set("Value", str(bpm))
+        for clip in root.iter("AudioClip"):
+            for path in ("CurrentEnd", "ScrollerTimePreserver/LeftTime", "ScrollerTimePreserver/RightTime"):
+                for elem in clip.iterfind(path):
+                    scale(elem, ratio)
+        for marker in warp_markers:
+            marker.set("SecTime", repr(float(marker.get("SecTime")) / ratio))
+    return root
+
+def same_value(a, b):
+    if a == b:
+        return True
+    try:
+        return math.isclose(float(a), float(b), rel_tol=1e-12)
+    except ValueError:
+        return False
+
+def assert_same_document(xml_data, expected_root):
+    """
+    Both documents have the same elements in the same order, with the same attribute values.
+    """
+    actual = list(ET.fromstring(xml_data).iter())
+    expected = list(expected_root.iter())
+    assert [e.tag for e in actual] == [e.tag for e in expected]
+    for a, e in zip(actual, expected):
+        assert a.attrib.keys() == e.attrib.keys(), a.tag
+        for attr in a.attrib:
+            assert same_value(a.get(attr), e.get(attr)), (a.tag, attr, a.get(attr), e.get(attr))
+
+@pytest.fixture
+def stems_root(tmp_path, monkeypatch):
+    """
+    A synthetic STEMS folder with one track at 128 BPM and one at 141 BPM, plus copies of the
+    templates (so slot sidecars are not written into alsFiles).
+    """
+    root = str(tmp_path / "STEMS")
+    templates = tmp_path / "alsFiles"
+    templates.mkdir()
+    for name in ("70.als", "128.als"):
+        shutil.copy(os.path.join(REPO, "alsFiles", name), templates / name)
+    folders = synthetic_stems.make_tree(root, bpms=2, keys=1, tracks=1, bpm_values=[128, 141],
+                                        min_seconds=5, max_seconds=10)
+    monkeypatch.setattr(alsGen, "FLAC_FOLDER", root)
+    monkeypatch.setattr(alsGen, "ALS_FILES_FOLDER", str(templates))
+    monkeypatch.setattr(alsGen, "CATALOG", False)
+    monkeypatch.setattr(trackTime, "DURATION_CACHE_PATH", None)
+    return {int(os.path.basename(os.path.dirname(os.path.dirname(f)))): f for f in folders}
+
+def render(folder, template_path=None):
+    folder, track_names, bpm = alsGen.job_for_folder(folder)
+    template_path = template_path or alsGen.select_blank_als(bpm)
+    loop_end = alsGen.get_loop_end(track_names, bpm)
+    als_data, _, _ = alsGen.render_als(template_path, track_names, bpm, loop_end, verbose=False, set_folder=folder)
+    samples = alsGen.sample_refs(track_names, folder)
+    return gzip.decompress(als_data), alsRewrite.read_als(template_path), track_names, bpm, loop_end, samples
+
+def test_fill_matches_elementtree(stems_root):
+    xml_data, template_xml, track_names, bpm, loop_end, samples = render(stems_root[128])
+    assert set(samples) == set(synthetic_stems.STEMS)
+    assert_same_document(xml_data, reference_fill(template_xml, track_names, loop_end, bpm, samples))
+
+def test_fill_without_samples_matches_elementtree(stems_root):
+    _, track_names, bpm = alsGen.job_for_folder(stems_root[128])
+    template_path = alsGen.select_blank_als(bpm)
+    xml_data, _ = templateCache.fill_template(templateCache.load_template(template_path), track_names,
+                                              "426.666667", verbose=False, bpm=bpm)
+    template_xml = alsRewrite.read_als(template_path)
+    assert_same_document(xml_data, reference_fill(template_xml, track_names, "426.666667", bpm))
+
+def test_fill_rescales_a_base_template(stems_root, monkeypatch):
+    base = os.path.join(alsGen.ALS_FILES_FOLDER, "70.als")
+    monkeypatch.setattr(alsGen, "BASE_TEMPLATE", base)
+    xml_data, template_xml, track_names, bpm, loop_end, samples = render(stems_root[141])
+    assert bpm == 141
+    assert_same_document(xml_data, reference_fill(template_xml, track_names, loop_end, bpm, samples))
+
+def test_fill_rescales_loop_end_without_a_new_one(stems_root):
+    template_path = os.path.join(alsGen.ALS_FILES_FOLDER, "70.als")
+    template_xml = alsRewrite.read_als(template_path)
+    xml_data, counts = templateCache.fill_template(templateCache.load_template(template_path), {}, None,
+                                                   verbose=False, bpm=141)
+    assert counts["tempo"]
+    assert_same_document(xml_data, reference_fill(template_xml, {}, None, 141))
+
+def write_template(path, xml_data):
+    with open(path, "wb") as f:
+        f.write(gzip.compress(xml_data))
+    return str(path)
+
+WARP_MARKER = re.compile(rb'\s*<WarpMarker [^>]*/>')
+
+def test_fill_rescales_a_template_without_warped_clips(tmp_path):
+    template_xml = WARP_MARKER.sub(b"", alsRewrite.read_als(os.path.join(REPO, "alsFiles", "128.als")))
+    template = templateCache.load_template(write_template(tmp_path / "unwarped.als", template_xml))
+    assert template["bpm"] == 70  # The master tempo
+    xml_data, counts = templateCache.fill_template(template, {}, None, verbose=False, bpm=141)
+    assert counts["tempo"]
+    assert_same_document(xml_data, reference_fill(template_xml, {}, None, 141))
+
+def test_fill_refuses_a_template_without_a_tempo(tmp_path):
+    template_xml = WARP_MARKER.sub(b"", alsRewrite.read_als(os.path.join(REPO, "alsFiles", "70.als")))
+    template_xml = re.sub(rb'(<Tempo>\s*<LomId Value="0" />\s*)<Manual Value="[^"]*" />', rb"\1", template_xml, count=1)
+    template = templateCache.load_template(write_template(tmp_path / "no-tempo.als", template_xml))
+    assert template["bpm"] is None
+    with pytest.raises(ValueError):
+        templateCache.fill_template(template, {}, None, verbose=False, bpm=141)
+
+# A small document with the cases the stream editor has to get right across chunk boundaries:
+# a clip whose sample comes after its loop (decided when the clip closes), a clip playing a
+# non-stem file, a LoopEnd outside any clip, entities and multi-byte characters.
+SMALL_SET = """<?xml version="1.0" encoding="UTF-8"?>
+<Ableton>
+\t<LiveSet>
+\t\t<Tracks>
+\t\t\t<AudioTrack Id="1">
+\t\t\t\t<Name><EffectiveName Value="drums-Café &amp; Crème" /></Name>
+\t\t\t\t<AudioClip Id="0" Time="0">
+\t\t\t\t\t<Loop><LoopStart Value="0" /><LoopEnd Value="32" /><OutMarker Value="32" /></Loop>
+\t\t\t\t\t<SampleRef><FileRef><Path Value="/Stems/128/5A/drums-Café &amp; Crème.flac" /></FileRef></SampleRef>
+\t\t\t\t</AudioClip>
+\t\t\t\t<AudioClip Id="1" Time="32">
+\t\t\t\t\t<SampleRef><FileRef><Path Value="/Samples/Crash – 808.wav" /></FileRef></SampleRef>
+\t\t\t\t\t<Loop><LoopStart Value="0" /><LoopEnd Value="4" /><OutMarker Value="4" /></Loop>
+\t\t\t\t</AudioClip>
+\t\t\t\t<AudioClip Id="2" Time="36">
+\t\t\t\t\t<SampleRef><FileRef><RelativePath Value="../vocals-Ünïcödé.flac" /></FileRef></SampleRef>
+\t\t\t\t\t<Loop><LoopStart Value="0" /><LoopEnd Value="16" /><OutMarker Value="16" /></Loop>
+\t\t\t\t</AudioClip>
+\t\t\t</AudioTrack>
+\t\t</Tracks>
+\t\t<Transport><LoopEnd Value="64" /></Transport>
+\t</LiveSet>
+</Ableton>
+""".encode("utf-8")
+
+def stream_rules():
+    return [alsStream.rule(f"AudioTrack/**/AudioClip/Loop/{tag}", "426.666667", scope="AudioClip",
+                           when=alsStream.in_stem_clip(stemClassifier.classify))
+            for tag in alsRewrite.MARKER_TAGS] + [
+        alsStream.rule("Path", lambda old, scope: old.replace("/Stems/", "/Moved Stems/")),
+    ]
+
+def reference_stream(xml_data):
+    root = ET.fromstring(xml_data)
+    for clip in stem_clips(root):
+        for tag in alsRewrite.MARKER_TAGS:
+            clip.find(f"Loop/{tag}").set("Value", "426.666667")
+    for elem in root.iter("Path"):
+        elem.set("Value", elem.get("Value").replace("/Stems/", "/Moved Stems/"))
+    return root
+
+def edit_in_chunks(xml_data, chunk_size):
+    out = io.BytesIO()
+    counts, _ = alsStream.edit_stream(io.BytesIO(xml_data).read, out.write, stream_rules(), chunk_size=chunk_size)
+    return out.getvalue(), counts
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 16, 61, 4096])
+def test_stream_editor_is_chunk_independent(chunk_size):
+    expected, expected_counts = alsStream.edit_bytes(SMALL_SET, stream_rules())
+    assert_same_document(expected, reference_stream(SMALL_SET))
+    assert expected_counts["AudioTrack/**/AudioClip/Loop/LoopEnd"] == 2
+    assert edit_in_chunks(SMALL_SET, chunk_size) == (expected, expected_counts)
+
+@pytest.mark.parametrize("chunk_size", [61, 4093, None])
+def test_stream_editor_on_a_template(chunk_size):
+    xml_data = alsRewrite.read_als(os.path.join(REPO, "alsFiles", "128.als"))
+    edited, counts = edit_in_chunks(xml_data, chunk_size)
+    assert counts["AudioTrack/**/AudioClip/Loop/LoopEnd"]
+    assert edited == alsStream.edit_bytes(xml_data, stream_rules())[0]
+    assert_same_document(edited, reference_stream(xml_data))
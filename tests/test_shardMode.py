@@ -0,0 +1,50 @@
+import json
+import os
+import time
+import pytest
+from alsgen import shardMode
+
+def read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+def age(path, seconds):
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+@pytest.mark.parametrize("text", ["3/2", "0/2", "2", "a/b"])
+def test_parse_shard_rejects_bad_specs(text):
+    with pytest.raises(ValueError):
+        shardMode.parse_shard(text)
+
+def test_a_live_lock_is_left_alone(tmp_path):
+    path = shardMode.acquire_lock(str(tmp_path), "128/8A/Track", owner="node-a:1")
+    held = read(path)
+    assert shardMode.acquire_lock(str(tmp_path), "128/8A/Track", owner="node-b:2") is None
+    assert read(path) == held
+
+def test_a_stale_lock_is_taken_over(tmp_path):
+    path = shardMode.acquire_lock(str(tmp_path), "128/8A/Track", owner="node-a:1")
+    age(path, shardMode.LOCK_STALE_SECONDS + 60)
+    assert shardMode.acquire_lock(str(tmp_path), "128/8A/Track", owner="node-b:2") == path
+    assert json.loads(read(path))["owner"] == "node-b:2"
+    assert os.listdir(tmp_path) == [os.path.basename(path)]  # No renamed-away lock left behind
+
+def test_a_lock_renewed_while_breaking_it_is_put_back(tmp_path, monkeypatch):
+    path = shardMode.acquire_lock(str(tmp_path), "128/8A/Track", owner="node-a:1")
+    age(path, shardMode.LOCK_STALE_SECONDS + 60)
+    fresh = json.dumps({"folder": "128/8A/Track", "owner": "node-c:3", "acquired_at": time.time()}).encode()
+    rename = os.rename
+
+    def node_c_takes_over_first(src, dst):
+        # Another node replaces the stale lock between our stat() and rename()
+        with open(path + ".tmp", "wb") as f:
+            f.write(fresh)
+        os.replace(path + ".tmp", path)
+        monkeypatch.setattr(os, "rename", rename)
+        rename(src, dst)
+
+    monkeypatch.setattr(os, "rename", node_c_takes_over_first)
+    assert shardMode.acquire_lock(str(tmp_path), "128/8A/Track", owner="node-b:2") is None
+    assert read(path) == fresh
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
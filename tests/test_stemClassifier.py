@@ -0,0 +1,53 @@
+import pytest
+from alsgen import stemClassifier
+
+@pytest.mark.parametrize("name, slot", [
+    ("drums-Track.flac", "drums"),
+    ("vocals-Track.flac", "vocals"),
+    ("Inst-Track.flac", "Inst"),
+    ("bass-Track.flac", "bass"),
+    ("Track (Vocals).flac", "vocals"),
+    ("01 - Track - Drums.flac", "drums"),
+    # A leading label wins over a title that ends in another stem word
+    ("drums-Song Vocals.flac", "drums"),
+    ("Inst-No Vocals.flac", "Inst"),
+    ("bass-Kick Drums.flac", "bass"),
+    # A label after " - " wins over a title that starts with another stem word
+    ("Other Side - vocals.flac", "vocals"),
+    ("Keys To The City - vocals.flac", "vocals"),
+    ("Bass Boost - drums.flac", "drums"),
+    ("Song-vocals.flac", "vocals"),
+    # Separator output named after the stem alone, or everything but it
+    ("vocals.flac", "vocals"),
+    ("no_vocals.flac", "Inst"),
+    ("Song - without drums.flac", "Inst"),
+    # Without a label, a trailing stem word wins
+    ("Instrumental Vocals.flac", "vocals"),
+    # Whole words only
+    ("drums-Instant Crush.flac", "drums"),
+    ("Instant Crush.flac", None),
+    ("Track.flac", None),
+])
+def test_classify(name, slot):
+    assert stemClassifier.classify(name) == slot
+
+class Entry:
+    def __init__(self, name):
+        self.name = name
+
+def test_classify_folder_keeps_every_stem_of_a_folder():
+    names = ["vocals-Song Vocals.flac", "drums-Song Vocals.flac", "Inst-Song Vocals.flac"]
+    track_names = stemClassifier.classify_folder([Entry(name) for name in names])
+    assert track_names["vocals"] == "vocals-Song Vocals.flac"
+    assert track_names["drums"] == "drums-Song Vocals.flac"
+    assert track_names["Inst"] == "Inst-Song Vocals.flac"
+    assert track_names["bass"] is None
+
+def test_classify_folder_fills_inst_from_a_demucs_two_stem_split():
+    track_names = stemClassifier.classify_folder([Entry("no_vocals.flac"), Entry("vocals.flac")])
+    assert track_names["vocals"] == "vocals.flac"
+    assert track_names["Inst"] == "no_vocals.flac"
+
+def test_a_real_stem_beats_a_complement_in_the_same_slot():
+    track_names = stemClassifier.classify_folder([Entry("no_vocals.flac"), Entry("Inst-Song.flac")])
+    assert track_names["Inst"] == "Inst-Song.flac"
@@ -0,0 +1,37 @@
+import os
+import random
+import shutil
+import threading
+from alsgen import templateCache
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_cache_size_stays_consistent_across_threads(tmp_path):
+    paths = []
+    for name in ("70.als", "120.als", "128.als", "140.als"):
+        shutil.copy(os.path.join(REPO, "alsFiles", name), tmp_path / name)
+        paths.append(str(tmp_path / name))
+    one = templateCache.load_template(paths[0])["size"]
+    # Room for about two templates, so threads keep evicting each other's entries
+    cache = templateCache.TemplateCache(max_bytes=int(one * 2.5))
+    errors = []
+
+    def work(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(15):
+                path = rng.choice(paths)
+                assert cache.get(path)["path"] == path
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(seed,)) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert cache.size == sum(entry["size"] for entry in cache._entries.values())
+    assert cache.size <= cache.max_bytes
+    assert len(cache._entries) == len(set(cache._entries))
+    assert cache.hits + cache.misses == 8 * 15
@@ -0,0 +1,50 @@
+import threading
+import time
+from alsgen import watchMode
+
+class ScriptedWatcher:
+    """
+    Reports the given change batches one poll at a time, then nothing until `polls` is reached.
+    """
+    name = "scripted"
+
+    def __init__(self, batches, polls=30):
+        self.batches = list(batches)
+        self.polls = polls
+
+    def poll(self, timeout):
+        time.sleep(0.02)
+        self.polls -= 1
+        if self.polls < 0:
+            raise KeyboardInterrupt
+        return set(self.batches.pop(0)) if self.batches else set()
+
+    def close(self):
+        pass
+
+def test_a_queued_folder_that_changes_again_runs_once(tmp_path, monkeypatch):
+    folders = {name: str(tmp_path / name) for name in ("A", "B")}
+    for folder in folders.values():
+        (tmp_path / folder).mkdir()
+    # B changes again while it waits behind A for the single worker
+    watcher = ScriptedWatcher([[folders["A"], folders["B"]], [folders["B"]], [folders["B"]]])
+    monkeypatch.setattr(watchMode, "make_watcher", lambda root, backend=None: watcher)
+    done = set()
+    runs = []
+    lock = threading.Lock()
+
+    def ready_job(folder):
+        return None if folder in done else (folder,)
+
+    def worker(job):
+        if job[0] == folders["A"]:
+            time.sleep(0.2)
+        with lock:
+            runs.append(job[0])
+            done.add(job[0])
+        return "written"
+
+    counts = watchMode.run_watch(str(tmp_path), ready_job, worker, workers=1, executor="thread", debounce=0,
+                                 status_path=str(tmp_path / "status.json"))
+    assert sorted(runs) == [folders["A"], folders["B"]]
+    assert counts["written"] == 2